@@ -0,0 +1,287 @@
+import random
+
+import numpy as np
+
+import stimulus_engine
+
+# ==========================================
+# ## Parameter Definitions (User Configuration)
+# ==========================================
+
+# 1. Procedure Parameters
+CENTER_FREQ = 1000  # Center frequency (Hz)
+START_DELTA_HZ = 20.0  # Starting frequency difference (Hz)
+MIN_DELTA_HZ = 0.1  # Smallest difference the procedures may present (Hz)
+MAX_DELTA_HZ = 100.0  # Largest difference the procedures may present (Hz)
+SAMPLE_RATE = 44100  # Sampling rate
+
+# 2. Psychometric Function (2AFC "which tone is higher")
+# p(correct | delta) = GUESS + (1 - GUESS - LAPSE) * (1 - exp(-(delta / threshold) ** SLOPE))
+GUESS = 0.5  # Chance level for First/Second
+LAPSE = 0.02  # Rate of attention lapses
+SLOPE = 2.0  # Weibull slope
+
+# 3. Simulation Parameters
+TRUE_THRESHOLDS_HZ = [2.0, 6.0, 15.0]  # Simulated observers
+NUM_RUNS = 200  # Simulated runs per procedure and observer
+MAX_TRIALS = 120  # Trials per simulated run
+TARGET_LOG_RMS = 0.1  # Target precision: RMS error of log10(threshold) (0.1 is about +/-26%)
+LADDER_STEP_HZ = 1.0  # Step of the fixed descending ladder used as a baseline
+LADDER_PAIRS = 10  # Rungs of the fixed ladder
+SEED = 0
+
+
+# ==========================================
+# ## Psychometric Model
+# ==========================================
+
+def p_correct(delta, threshold, slope=SLOPE, guess=GUESS, lapse=LAPSE):
+    """Probability of a correct First/Second answer at a given frequency difference."""
+    delta = np.maximum(delta, 0)
+    return guess + (1 - guess - lapse) * (1 - np.exp(-(delta / threshold) ** slope))
+
+
+def delta_at(p, threshold, slope=SLOPE, guess=GUESS, lapse=LAPSE):
+    """Frequency difference at which the observer is correct with probability p."""
+    return threshold * (-np.log(1 - (p - guess) / (1 - guess - lapse))) ** (1 / slope)
+
+
+# ==========================================
+# ## Procedures
+# ==========================================
+
+class Staircase:
+    """
+    Transformed up-down staircase on the frequency difference (N-down 1-up).
+
+    The difference is divided by `step_factor` after `n_down` consecutive
+    correct answers and multiplied after each error. The step shrinks to
+    its square root after the first `fine_after` reversals, and the
+    threshold is the geometric mean of the last `average_reversals`
+    reversal points. 2-down 1-up converges on 70.7% correct, 3-down 1-up
+    on 79.4%.
+    """
+
+    def __init__(self, start_delta=START_DELTA_HZ, n_down=2, step_factor=2.0, fine_after=2, average_reversals=6,
+                 min_delta=MIN_DELTA_HZ, max_delta=MAX_DELTA_HZ):
+        self.delta = start_delta
+        self.n_down = n_down
+        self.step_factor = step_factor
+        self.fine_after = fine_after
+        self.average_reversals = average_reversals
+        self.min_delta = min_delta
+        self.max_delta = max_delta
+        self.correct_run = 0
+        self.direction = 0  # -1 going down, +1 going up
+        self.reversals = []
+        self.target_p = 0.5 ** (1 / n_down)
+
+    def next_delta(self):
+        return self.delta
+
+    def update(self, delta, correct):
+        """Score one answer given at `delta` (the difference that was presented)."""
+        if correct:
+            self.correct_run += 1
+            if self.correct_run < self.n_down:
+                return
+            self.correct_run = 0
+            direction = -1
+        else:
+            self.correct_run = 0
+            direction = 1
+
+        if self.direction and direction != self.direction:
+            self.reversals.append(delta)
+        self.direction = direction
+
+        factor = self.step_factor if len(self.reversals) < self.fine_after else np.sqrt(self.step_factor)
+        self.delta = float(np.clip(delta * factor ** direction, self.min_delta, self.max_delta))
+
+    def update_trial(self, delta, n_correct, n_answers):
+        """Score a trial of several pairs at one difference: it counts as correct only if every pair was."""
+        self.update(delta, n_correct == n_answers)
+
+    def threshold(self):
+        """Geometric mean of the last reversals (the current difference before any reversal)."""
+        points = self.reversals[self.fine_after:][-self.average_reversals:] or [self.delta]
+        return float(np.exp(np.mean(np.log(points))))
+
+
+class Quest:
+    """
+    QUEST-like Bayesian procedure on log10 of the threshold.
+
+    Keeps a posterior over a grid of candidate thresholds, places each trial
+    at the difference where the posterior mean threshold sits on the
+    psychometric function, and reports the posterior mean.
+    """
+
+    def __init__(self, start_delta=START_DELTA_HZ, prior_sd=1.0, min_delta=MIN_DELTA_HZ, max_delta=MAX_DELTA_HZ,
+                 grid_size=400, target_p=None):
+        self.grid = np.linspace(np.log10(min_delta), np.log10(max_delta), grid_size)
+        self.log_posterior = -0.5 * ((self.grid - np.log10(start_delta)) / prior_sd) ** 2
+        self.min_delta = min_delta
+        self.max_delta = max_delta
+        self.target_p = target_p if target_p is not None else float(p_correct(1.0, 1.0))
+
+    def posterior(self):
+        weights = np.exp(self.log_posterior - self.log_posterior.max())
+        return weights / weights.sum()
+
+    def next_delta(self):
+        best = 10 ** np.sum(self.posterior() * self.grid)
+        return float(np.clip(delta_at(self.target_p, best), self.min_delta, self.max_delta))
+
+    def update(self, delta, correct):
+        p = p_correct(delta, 10 ** self.grid)
+        self.log_posterior += np.log(p if correct else 1 - p)
+
+    def update_trial(self, delta, n_correct, n_answers):
+        """Score a trial of several pairs at one difference (each pair is an independent 2AFC answer)."""
+        p = p_correct(delta, 10 ** self.grid)
+        self.log_posterior += n_correct * np.log(p) + (n_answers - n_correct) * np.log(1 - p)
+
+    def threshold(self):
+        """Delta at target_p for the posterior mean threshold."""
+        return float(delta_at(self.target_p, 10 ** np.sum(self.posterior() * self.grid)))
+
+    def sd(self):
+        """Posterior standard deviation of log10(threshold)."""
+        posterior = self.posterior()
+        mean = np.sum(posterior * self.grid)
+        return float(np.sqrt(np.sum(posterior * (self.grid - mean) ** 2)))
+
+
+class FixedLadder(Quest):
+    """
+    Baseline: the current fixed descending ladder (CENTER_FREQ - (i+1) * STEP_HZ),
+    presented in shuffled order and scored with the same Bayesian estimate.
+    """
+
+    def __init__(self, step=LADDER_STEP_HZ, num_pairs=LADDER_PAIRS, rng=None, **kwargs):
+        super().__init__(**kwargs)
+        self.ladder = [(i + 1) * step for i in range(num_pairs)]
+        self.rng = rng or random.Random()
+        self.queue = []
+
+    def next_delta(self):
+        if not self.queue:
+            self.queue = self.ladder[:]
+            self.rng.shuffle(self.queue)
+        return self.queue.pop()
+
+
+# ==========================================
+# ## Stimulus Generation
+# ==========================================
+
+class AdaptiveSession:
+    """
+    Generate stimuli on demand for one participant from a procedure.
+
+    Each trial uses the existing pair layout (200ms blank, tone, 200ms blank,
+    tone, 4 x 200ms blank) with `pairs_per_trial` pairs at the procedure's
+    current difference, and the same F/S answer coding as make_audio_record.
+    The procedure is asked for one difference and updated once per trial.
+    """
+
+    def __init__(self, procedure, center_freq=CENTER_FREQ, pairs_per_trial=1, sample_rate=SAMPLE_RATE, rng=random):
+        self.procedure = procedure
+        self.center_freq = center_freq
+        self.pairs_per_trial = pairs_per_trial
+        self.sample_rate = sample_rate
+        self.rng = rng
+        self.current = None
+        self.history = []  # (comparison frequency, answer code, response) per trial
+
+    def next_trial(self):
+        """
+        Render the next trial.
+
+        Returns:
+            1. audio: 16-bit PCM samples of the trial
+            2. comp_freq: Comparison frequency (Hz)
+            3. code_str: Answer code such as "F" (or "FSFF" for 4 pairs per trial)
+        """
+        delta = self.procedure.next_delta()
+        comp_freq = self.center_freq - delta
+        codes = np.array([[self.rng.choice([True, False]) for _ in range(self.pairs_per_trial)]])
+        audio = stimulus_engine.render_clips(self.center_freq, [comp_freq], codes, self.sample_rate,
+                                             dtype=np.int16, tone_dtype=np.float32)[0]
+        code_str = stimulus_engine.code_strings(codes)[0]
+        self.current = (delta, comp_freq, code_str)
+        return audio, comp_freq, code_str
+
+    def record_response(self, response):
+        """Score a response string of F/S (or First/Second) answers, one per pair, and update the procedure."""
+        if self.current is None:
+            raise RuntimeError("record_response() called before next_trial()")
+        delta, comp_freq, code_str = self.current
+        answers = [response] if response in ("First", "Second") else list(response)
+        answers = [answer[0].upper() for answer in answers]
+        if len(answers) != len(code_str):
+            raise ValueError(f"Expected {len(code_str)} answers, got {response!r}")
+        n_correct = sum(answer == correct_char for answer, correct_char in zip(answers, code_str))
+        self.procedure.update_trial(delta, n_correct, len(code_str))
+        self.history.append((comp_freq, code_str, "".join(answers)))
+        self.current = None
+
+
+# ==========================================
+# ## Simulation Harness
+# ==========================================
+
+PROCEDURES = {
+    "fixed ladder": lambda rng: FixedLadder(rng=rng),
+    "2-down 1-up": lambda rng: Staircase(n_down=2),
+    "3-down 1-up": lambda rng: Staircase(n_down=3),
+    "QUEST": lambda rng: Quest(),
+}
+
+
+def simulate(make_procedure, true_threshold, num_runs=NUM_RUNS, max_trials=MAX_TRIALS, seed=SEED):
+    """
+    Run simulated observers through a procedure.
+
+    Returns:
+        Array (num_runs, max_trials) of log10 errors of the threshold estimate
+        after each trial, relative to the observer's difference at the
+        procedure's target performance level
+    """
+    rng = random.Random(seed)
+    errors = np.empty((num_runs, max_trials))
+    for run in range(num_runs):
+        procedure = make_procedure(rng)
+        true_delta = delta_at(procedure.target_p, true_threshold)
+        for trial in range(max_trials):
+            delta = procedure.next_delta()
+            procedure.update(delta, rng.random() < p_correct(delta, true_threshold))
+            errors[run, trial] = np.log10(procedure.threshold() / true_delta)
+    return errors
+
+
+def trials_to_precision(errors, target=TARGET_LOG_RMS):
+    """First trial count after which the RMS log error stays at or below target (None if never)."""
+    rms = np.sqrt(np.mean(errors ** 2, axis=0))
+    above = np.nonzero(rms > target)[0]
+    if len(above) == 0:
+        return 1
+    return int(above[-1]) + 2 if above[-1] + 1 < len(rms) else None
+
+
+def main():
+    print(f"Target precision: RMS log10 error <= {TARGET_LOG_RMS} ({NUM_RUNS} runs, up to {MAX_TRIALS} trials)")
+    print(f"{'procedure':<16}" + "".join(f"{f'JND {t:g} Hz':>14}" for t in TRUE_THRESHOLDS_HZ))
+    for name, make_procedure in PROCEDURES.items():
+        cells = []
+        for true_threshold in TRUE_THRESHOLDS_HZ:
+            errors = simulate(make_procedure, true_threshold)
+            needed = trials_to_precision(errors)
+            final_rms = np.sqrt(np.mean(errors[:, -1] ** 2))
+            cells.append(f"{needed} trials" if needed else f"rms {final_rms:.2f}")
+        print(f"{name:<16}" + "".join(f"{cell:>14}" for cell in cells))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,63 @@
+import os
+
+import numpy as np
+from scipy.io import wavfile
+
+try:
+    import soundfile  # Only needed for FLAC export: pip install soundfile
+except ImportError:
+    soundfile = None
+
+# ==========================================
+# ## Parameter Definitions
+# ==========================================
+
+AUDIO_FORMATS = ("wav", "flac")  # Supported stimulus file formats
+
+
+# ==========================================
+# ## Core Logic
+# ==========================================
+
+def require_soundfile():
+    if soundfile is None:
+        raise ImportError("FLAC export needs the soundfile package: pip install soundfile")
+
+
+def with_extension(filename, audio_format):
+    """Replace the extension of a stimulus filename with the one of audio_format."""
+    if audio_format not in AUDIO_FORMATS:
+        raise ValueError(f"Unknown audio format {audio_format!r}; expected one of {AUDIO_FORMATS}")
+    return f"{os.path.splitext(filename)[0]}.{audio_format}"
+
+
+def write_audio(path, sample_rate, audio, audio_format="wav"):
+    """
+    Write 16-bit PCM audio as WAV or lossless FLAC.
+
+    Returns:
+        Size of the written file in bytes
+    """
+    if audio_format == "wav":
+        wavfile.write(path, sample_rate, audio)
+    elif audio_format == "flac":
+        require_soundfile()
+        soundfile.write(path, audio, sample_rate, format="FLAC", subtype="PCM_16")
+    else:
+        raise ValueError(f"Unknown audio format {audio_format!r}; expected one of {AUDIO_FORMATS}")
+    return os.path.getsize(path)
+
+
+def read_audio(path):
+    """Read a WAV or FLAC stimulus back as (sample_rate, int16 samples)."""
+    if path.lower().endswith(".flac"):
+        require_soundfile()
+        audio, sample_rate = soundfile.read(path, dtype="int16")
+        return sample_rate, audio
+    return wavfile.read(path)
+
+
+def roundtrip_equal(path, audio):
+    """Check that a written file decodes to exactly the given samples."""
+    _, decoded = read_audio(path)
+    return decoded.shape == audio.shape and np.array_equal(decoded, audio)
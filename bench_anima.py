@@ -0,0 +1,100 @@
+import os
+import sys
+import time
+import tracemalloc
+
+import numpy as np
+from manim import Axes, BLUE, YELLOW
+from manim.constants import QUALITIES
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "make_anima"))
+from two_sin_wave import SineWave
+
+# ==========================================
+# ## Parameter Definitions (User Configuration)
+# ==========================================
+
+AMPLITUDE = 20.0  # As in TwoSineWaves
+FREQUENCY = 3  # Top wave of TwoSineWaves
+X_RANGE = [0, 6, 0.01]  # 600 samples, as in TwoSineWaves
+ANIMATED_SECONDS = 6  # Seconds of TwoSineWaves during which one wave is updated every frame
+FRAMES = 200  # Frames timed per updater
+REPEATS = 3  # Timing repeats (best of)
+
+
+# ==========================================
+# ## Updaters
+# ==========================================
+
+def make_axes():
+    return Axes(x_range=[0, 6, 1], y_range=[-AMPLITUDE * 1.5, AMPLITUDE * 1.5, AMPLITUDE], x_length=10, y_length=3,
+                axis_config={"color": BLUE})
+
+
+def legacy_updater(axes):
+    """The original updater: plot a new 600-point curve and become() it every frame."""
+    graph = axes.plot(lambda x: AMPLITUDE * np.sin(2 * np.pi * FREQUENCY * x), x_range=X_RANGE, color=YELLOW)
+
+    def update(time_offset):
+        graph.become(axes.plot(lambda x: AMPLITUDE * np.sin(2 * np.pi * FREQUENCY * (x - time_offset)),
+                               x_range=X_RANGE, color=YELLOW))
+    return graph, update
+
+
+def in_place_updater(axes):
+    """SineWave: shift the existing points in place."""
+    graph = SineWave(axes, AMPLITUDE, FREQUENCY, X_RANGE, color=YELLOW)
+    return graph, graph.set_time_offset
+
+
+UPDATERS = [
+    ("legacy plot+become", legacy_updater),
+    ("in-place SineWave", in_place_updater),
+]
+
+
+# ==========================================
+# ## Measurement
+# ==========================================
+
+def measure(make_updater, frame_rate=60):
+    """Return (best seconds per frame, peak traced bytes over all frames, anchor points after the last frame)."""
+    axes = make_axes()
+    graph, update = make_updater(axes)
+    offsets = np.arange(FRAMES) / frame_rate
+    best = float("inf")
+    for _ in range(REPEATS):
+        start = time.perf_counter()
+        for offset in offsets:
+            update(offset)
+        best = min(best, (time.perf_counter() - start) / FRAMES)
+
+    tracemalloc.start()
+    for offset in offsets:
+        update(offset)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return best, peak, graph.get_anchors()
+
+
+def main():
+    results = {name: measure(make_updater) for name, make_updater in UPDATERS}
+    reference = results[UPDATERS[0][0]][2]
+    print(f"== per-frame updater cost ({FRAMES} frames, {len(reference) // 2} segments)")
+    print(f"{'updater':<22}{'frame (ms)':>12}{'peak KB':>10}{'max anchor err':>16}")
+    for name, (seconds, peak, anchors) in results.items():
+        error = np.abs(anchors - reference).max() if len(anchors) == len(reference) else float("nan")
+        print(f"{name:<22}{seconds * 1000:>12.3f}{peak / 1e3:>10.1f}{error:>16.2e}")
+    print()
+
+    # Updater cost is per frame, so its share of a render grows with the frame rate of the quality
+    print(f"== updater time per {ANIMATED_SECONDS} s of TwoSineWaves")
+    print(f"{'quality':<22}{'fps':>6}{'frames':>8}" + "".join(f"{name + ' (s)':>22}" for name, _ in UPDATERS))
+    for quality, settings in QUALITIES.items():
+        frames = int(ANIMATED_SECONDS * settings["frame_rate"])
+        times = "".join(f"{results[name][0] * frames:>22.3f}" for name, _ in UPDATERS)
+        print(f"{quality:<22}{settings['frame_rate']:>6}{frames:>8}{times}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,67 @@
+import os
+import random
+import tempfile
+import time
+
+import numpy as np
+
+import audio_export
+import make_audio_record
+import stimulus_engine
+
+# ==========================================
+# ## Parameter Definitions (User Configuration)
+# ==========================================
+
+# (center frequency, step) per condition; one clip per comparison frequency
+CONDITIONS = [(200, 1), (1000, 1), (5000, 6)]
+NUM_PAIRS = 10  # Clips per condition
+SEED = 0
+
+
+# ==========================================
+# ## Benchmark
+# ==========================================
+
+def render_set():
+    """Render the clips of every condition as 16-bit PCM."""
+    rng = random.Random(SEED)
+    clips = []
+    for center_freq, step in CONDITIONS:
+        comp_freqs = [center_freq - (i + 1) * step for i in range(NUM_PAIRS)]
+        codes = make_audio_record.draw_codes(NUM_PAIRS, rng)
+        clips.extend(make_audio_record.render_batch(center_freq, comp_freqs, codes, dtype=np.int16))
+    return clips
+
+
+def main():
+    clips = render_set()
+    results = {}
+    with tempfile.TemporaryDirectory() as folder:
+        for audio_format in audio_export.AUDIO_FORMATS:
+            paths = [os.path.join(folder, f"clip-{i}.{audio_format}") for i in range(len(clips))]
+            start = time.perf_counter()
+            sizes = [audio_export.write_audio(path, make_audio_record.SAMPLE_RATE, audio, audio_format)
+                     for path, audio in zip(paths, clips)]
+            encode_time = time.perf_counter() - start
+
+            start = time.perf_counter()
+            exact = all(audio_export.roundtrip_equal(path, audio) for path, audio in zip(paths, clips))
+            decode_time = time.perf_counter() - start
+            results[audio_format] = (sum(sizes), encode_time, decode_time, exact)
+
+    wav_bytes, wav_time = results["wav"][:2]
+    print(f"{len(clips)} clips of {stimulus_engine.PAIRS_PER_CLIP} pairs")
+    print(f"{'format':<8}{'total MB':>10}{'ratio':>8}{'encode ms':>12}{'decode ms':>12}{'bit-exact':>11}")
+    for audio_format, (total, encode_time, decode_time, exact) in results.items():
+        print(f"{audio_format:<8}{total / 1e6:>10.2f}{total / wav_bytes:>8.1%}{encode_time * 1000:>12.1f}"
+              f"{decode_time * 1000:>12.1f}{str(exact):>11}")
+
+    flac_bytes, flac_time = results["flac"][:2]
+    saved_mb = (wav_bytes - flac_bytes) / 1e6
+    print(f"FLAC saves {saved_mb:.2f} MB for {(flac_time - wav_time) * 1000:.1f} ms of extra encode time "
+          f"({saved_mb / max(flac_time - wav_time, 1e-9):.1f} MB saved per second spent)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,126 @@
+import time
+import tracemalloc
+
+import numpy as np
+
+import stimulus_engine
+
+# ==========================================
+# ## Parameter Definitions (User Configuration)
+# ==========================================
+
+SAMPLE_RATE = 44100  # Sampling rate
+REPEATS = 5  # Timing repeats (best of)
+
+# (label, frequencies, duration in seconds)
+CASES = [
+    ("5000 Hz group, 500 ms tones", [5000 - 6 * i for i in range(11)], 0.5),
+    ("200 Hz group, 0.1 Hz steps", [200 - 0.1 * i for i in range(11)], 0.5),
+    ("long tones, 60 s", [200, 1000, 5000], 60.0),
+]
+
+# Harmonic complex tones: fundamentals of the 1000 Hz group with 10 harmonics of amplitude 1/h
+HARMONIC_FREQS = [1000 - i for i in range(11)]
+HARMONIC_AMPLITUDES = [1 / h for h in range(1, 11)]
+
+
+# ==========================================
+# ## Synthesis Paths
+# ==========================================
+
+def legacy_float64(frequencies, n_samples):
+    """The original make_audio.generate_sine_wave, one tone at a time."""
+    t = np.linspace(0, n_samples / SAMPLE_RATE, n_samples, endpoint=False)
+    return np.stack([np.sin(2 * np.pi * f * t) for f in frequencies])
+
+
+def direct_float32(frequencies, n_samples):
+    return stimulus_engine.tone_table(frequencies, n_samples, SAMPLE_RATE, np.float32, "direct")
+
+
+def recurrence_float32(frequencies, n_samples):
+    return stimulus_engine.tone_table(frequencies, n_samples, SAMPLE_RATE, np.float32, "recurrence")
+
+
+def harmonic_loop(frequencies, n_samples, harmonics):
+    """One np.sin per harmonic and tone, summed in Python."""
+    amplitudes, phases = harmonics
+    t = np.linspace(0, n_samples / SAMPLE_RATE, n_samples, endpoint=False)
+    tones = np.zeros((len(frequencies), n_samples))
+    for i, f in enumerate(frequencies):
+        for h, (a, phi) in enumerate(zip(amplitudes, phases), 1):
+            if h * f < SAMPLE_RATE / 2:
+                tones[i] += a * np.sin(2 * np.pi * h * f * t + phi)
+    return tones / np.abs(amplitudes).sum()
+
+
+def harmonic_matmul(frequencies, n_samples, harmonics, cache):
+    return stimulus_engine.complex_tone_table(frequencies, n_samples, SAMPLE_RATE, harmonics, np.float32, cache)
+
+
+PATHS = [
+    ("legacy float64", legacy_float64),
+    ("direct float32", direct_float32),
+    ("recurrence float32", recurrence_float32),
+]
+
+
+# ==========================================
+# ## Measurement
+# ==========================================
+
+def measure(fn, frequencies, n_samples):
+    """Return (best seconds, peak traced bytes, result) for one synthesis path."""
+    best = float("inf")
+    for _ in range(REPEATS):
+        start = time.perf_counter()
+        result = fn(frequencies, n_samples)
+        best = min(best, time.perf_counter() - start)
+
+    tracemalloc.start()
+    fn(frequencies, n_samples)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return best, peak, result
+
+
+def bench_harmonics():
+    """Compare the per-harmonic loop against the basis product, with a cold and a warm basis cache."""
+    harmonics = stimulus_engine.harmonic_spec(HARMONIC_AMPLITUDES)
+    n_samples = int(stimulus_engine.TONE_SECONDS * SAMPLE_RATE)
+    cache = stimulus_engine.HarmonicBasisCache()
+    paths = [
+        ("per-harmonic loop", lambda f, n: harmonic_loop(f, n, harmonics)),
+        ("basis, no cache", lambda f, n: harmonic_matmul(f, n, harmonics, None)),
+        ("basis, cached", lambda f, n: harmonic_matmul(f, n, harmonics, cache)),
+    ]
+    reference = harmonic_loop(HARMONIC_FREQS, n_samples, harmonics)
+    print(f"== harmonic complex: {len(HARMONIC_FREQS)} tones x {len(HARMONIC_AMPLITUDES)} harmonics x "
+          f"{n_samples} samples")
+    print(f"{'path':<20}{'time (ms)':>12}{'peak MB':>10}{'max err':>12}")
+    for name, fn in paths:
+        seconds, peak, result = measure(fn, HARMONIC_FREQS, n_samples)
+        print(f"{name:<20}{seconds * 1000:>12.2f}{peak / 1e6:>10.1f}{np.abs(result - reference).max():>12.2e}")
+    print()
+
+
+def main():
+    for label, frequencies, duration in CASES:
+        n_samples = int(duration * SAMPLE_RATE)
+        reference = stimulus_engine.tone_table(frequencies, n_samples, SAMPLE_RATE, np.float64)
+        reference_pcm = stimulus_engine.quantize_pcm16(reference)
+        print(f"== {label}: {len(frequencies)} tones x {n_samples} samples")
+        print(f"{'path':<20}{'time (ms)':>12}{'peak MB':>10}{'max err':>12}{'tail err':>12}{'int16 diff':>12}")
+        for name, fn in PATHS:
+            seconds, peak, result = measure(fn, frequencies, n_samples)
+            error = np.abs(result.astype(np.float64) - reference)
+            tail = error[:, -SAMPLE_RATE // 10:].max()  # Last 100 ms shows accumulated phase drift
+            pcm_diff = np.count_nonzero(stimulus_engine.quantize_pcm16(result) != reference_pcm) / reference_pcm.size
+            print(f"{name:<20}{seconds * 1000:>12.2f}{peak / 1e6:>10.1f}{error.max():>12.2e}{tail:>12.2e}"
+                  f"{pcm_diff:>11.4%}")
+        print()
+    bench_harmonics()
+
+
+if __name__ == "__main__":
+    main()
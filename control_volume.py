@@ -1,51 +1,80 @@
+import wave
+
 import numpy as np
 from scipy.io.wavfile import write
 
 # Parameter settings
 sample_rate = 44100       # Sampling rate (Hz)
 duration_total = 20       # Total duration (seconds)
-freq = 200                # Frequency (Hz)
+freqs = [200, 1000, 5000]  # Frequencies (Hz); one calibration file is written per frequency
 segment_duration = 0.3    # Segment duration (seconds)
 interval = 0.3            # Interval (seconds)
 volume_high = 0.2         # High volume
 volume_low = 0.000719     # Low volume
+streaming = False         # Write chunk by chunk with constant memory (for arbitrarily long files)
+chunk_duration = 10       # Chunk duration when streaming (seconds)
 
 # Calculate the number of samples per segment, interval, and cycle
 samples_per_segment = int(sample_rate * segment_duration)
 samples_per_interval = int(sample_rate * interval)
 samples_per_cycle = samples_per_segment + samples_per_interval
 
-# Calculate the total number of cycles
-num_cycles = int(duration_total / (segment_duration + interval))
 
-# Build the time axis and audio data
-t = np.linspace(0, segment_duration, samples_per_segment, False)
+def calibration_period(freq):
+    """
+    Build one loud cycle followed by one quiet cycle as 16-bit PCM.
+
+    Volumes are normalized so the loud segment peaks at full scale, as the
+    whole file used to be normalized to [-1, 1] after generation.
+    """
+    # Generate sine wave template
+    t = np.linspace(0, segment_duration, samples_per_segment, False)
+    sine_wave = np.sin(2 * np.pi * freq * t)
+
+    # Both cycles in one broadcast pass: (2 cycles, samples_per_cycle)
+    volumes = np.array([volume_high, volume_low]) / (volume_high * np.max(np.abs(sine_wave)))
+    period = np.zeros((2, samples_per_cycle))
+    period[:, :samples_per_segment] = volumes[:, None] * sine_wave
+    return np.int16(period.ravel() * 32767)
+
+
+def calibration_samples(period, start, stop, num_cycles):
+    """Return samples [start, stop) of the tiled pattern, silent after the last whole cycle."""
+    index = np.arange(start, stop)
+    samples = period[index % len(period)]
+    samples[index >= num_cycles * samples_per_cycle] = 0  # Pad with silence
+    return samples
 
-# Generate sine wave template
-sine_wave = np.sin(2 * np.pi * freq * t)
 
-# Initialize audio array
-audio_data = np.array([], dtype=np.float32)
+def write_calibration(filename, freq, duration=duration_total, stream=streaming):
+    """
+    Write a calibration file of alternating loud/quiet segments.
 
-# Loop to generate alternating high and low volume audio segments
-for i in range(num_cycles):
-    volume = volume_high if i % 2 == 0 else volume_low
-    segment = sine_wave * volume
-    # Append audio segment
-    audio_data = np.concatenate((audio_data, segment))
-    # Append silent interval
-    audio_data = np.concatenate((audio_data, np.zeros(samples_per_interval)))
+    When streaming, the file is written chunk by chunk so memory stays
+    constant regardless of the duration.
+    """
+    period = calibration_period(freq)
+    total_samples = int(sample_rate * duration)
+    # Calculate the total number of cycles
+    num_cycles = int(duration / (segment_duration + interval))
 
-# Pad with silence if total duration is less than 20 seconds
-total_samples_needed = sample_rate * duration_total
-if len(audio_data) < total_samples_needed:
-    padding = np.zeros(total_samples_needed - len(audio_data))
-    audio_data = np.concatenate((audio_data, padding))
+    if not stream:
+        write(filename, sample_rate, calibration_samples(period, 0, total_samples, num_cycles))
+        return
 
-# Normalize to [-1, 1]
-audio_data = audio_data / np.max(np.abs(audio_data))
+    chunk_samples = int(sample_rate * chunk_duration)
+    with wave.open(filename, "wb") as f:
+        f.setnchannels(1)
+        f.setsampwidth(2)
+        f.setframerate(sample_rate)
+        f.setnframes(total_samples)
+        for start in range(0, total_samples, chunk_samples):
+            stop = min(start + chunk_samples, total_samples)
+            f.writeframes(calibration_samples(period, start, stop, num_cycles).astype("<i2").tobytes())
 
-# Save as WAV file
-write("calibration200HZ.wav", sample_rate, audio_data)
 
-print("Audio saved as calibration200HZ.wav")
\ No newline at end of file
+if __name__ == "__main__":
+    for freq in freqs:
+        filename = f"calibration{freq}HZ.wav"
+        write_calibration(filename, freq)
+        print(f"Audio saved as {filename}")
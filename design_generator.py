@@ -0,0 +1,182 @@
+import os
+import sys
+
+import numpy as np
+
+import make_audio_batch
+import make_audio_record
+import stimulus_engine
+
+# ==========================================
+# ## Parameter Definitions (User Configuration)
+# ==========================================
+
+CONDITIONS = make_audio_batch.JOB_SPEC  # Conditions (center, step, num_pairs, group) in survey order
+NUM_PARTICIPANTS = 1000  # Number of per-participant designs to generate
+BALANCED = True  # Every clip has as many F as S answers
+MAX_RUN = 3  # No more than this many identical answers in a row within a condition
+SEED = 0  # Seed of the design; the same seed always gives the same file
+MAX_ATTEMPTS = 1000  # Rejection sampling rounds before giving up
+DESIGN_PATH = "design.npz"  # Output design file
+PAIRS_PER_CLIP = stimulus_engine.PAIRS_PER_CLIP
+
+
+# ==========================================
+# ## Design Generation
+# ==========================================
+
+def balanced_patterns(n_pairs=PAIRS_PER_CLIP):
+    """All F/S patterns of one clip with as many F as S, as a (n_patterns, n_pairs) boolean array."""
+    bits = (np.arange(2 ** n_pairs)[:, None] >> np.arange(n_pairs)[::-1]) & 1
+    return bits[bits.sum(axis=1) * 2 == n_pairs].astype(bool)
+
+
+def longest_run_exceeds(sequences, max_run):
+    """For each row of a boolean (rows, length) array, whether it has more than max_run equal values in a row."""
+    same = sequences[:, 1:] == sequences[:, :-1]
+    if same.shape[1] < max_run:
+        return np.zeros(len(sequences), dtype=bool)
+    windows = np.lib.stride_tricks.sliding_window_view(same, max_run, axis=1)
+    return windows.all(axis=-1).any(axis=-1)
+
+
+def sample_codes(rng, rows, n_clips, balanced=BALANCED, max_run=MAX_RUN, max_attempts=MAX_ATTEMPTS):
+    """
+    Draw answer codes for many (participant, condition) blocks at once.
+
+    Codes are sampled for every block in one vectorized draw; blocks that
+    break the run-length constraint are redrawn together until all pass.
+
+    Returns:
+        Boolean array (rows, n_clips, PAIRS_PER_CLIP); True means F
+    """
+    patterns = balanced_patterns() if balanced else None
+    codes = np.empty((rows, n_clips, PAIRS_PER_CLIP), dtype=bool)
+    pending = np.arange(rows)
+    for _ in range(max_attempts):
+        if balanced:
+            codes[pending] = patterns[rng.integers(len(patterns), size=(len(pending), n_clips))]
+        else:
+            codes[pending] = rng.random((len(pending), n_clips, PAIRS_PER_CLIP)) < 0.5
+        failed = longest_run_exceeds(codes[pending].reshape(len(pending), -1), max_run)
+        pending = pending[failed]
+        if len(pending) == 0:
+            return codes
+    raise RuntimeError(f"Could not satisfy MAX_RUN={max_run} for {len(pending)} blocks in {max_attempts} attempts")
+
+
+def generate_design(conditions=CONDITIONS, num_participants=NUM_PARTICIPANTS, seed=SEED, balanced=BALANCED,
+                    max_run=MAX_RUN):
+    """
+    Generate per-participant clip orders and answer codes for every condition.
+
+    Returns:
+        Dict of arrays:
+        - orders (participants, conditions, clips): index into comp_freqs of the clip at each position
+        - codes (participants, conditions, clips, pairs): answer code of the clip at each position
+        - centers, comp_freqs, groups: the conditions
+    """
+    if max_run < 1:
+        raise ValueError("MAX_RUN must be at least 1")
+    if balanced and PAIRS_PER_CLIP % 2:
+        raise ValueError("Balanced F/S codes need an even number of pairs per clip")
+    n_clips = conditions[0]["num_pairs"]
+    if any(condition["num_pairs"] != n_clips for condition in conditions):
+        raise ValueError("All conditions must have the same number of clips")
+
+    rng = np.random.default_rng(seed)
+    n_conditions = len(conditions)
+    orders = np.argsort(rng.random((num_participants, n_conditions, n_clips)), axis=-1).astype(np.uint16)
+    codes = sample_codes(rng, num_participants * n_conditions, n_clips, balanced, max_run)
+
+    return {
+        "orders": orders,
+        "codes": codes.reshape(num_participants, n_conditions, n_clips, PAIRS_PER_CLIP),
+        "centers": np.array([condition["center"] for condition in conditions], dtype=np.float64),
+        "comp_freqs": np.array([[condition["center"] - (i + 1) * condition["step"] for i in range(n_clips)]
+                                for condition in conditions], dtype=np.float64),
+        "groups": np.array([str(condition["group"]) for condition in conditions]),
+        "seed": np.array(seed if seed is not None else -1),
+        "max_run": np.array(max_run),
+        "balanced": np.array(balanced),
+    }
+
+
+# ==========================================
+# ## Design File
+# ==========================================
+
+def save_design(path, design):
+    """Save a design as a compressed .npz, with answer codes packed to bits."""
+    codes = design["codes"]
+    arrays = {key: value for key, value in design.items() if key != "codes"}
+    arrays["codes_packed"] = np.packbits(codes.reshape(*codes.shape[:2], -1), axis=-1)
+    arrays["pairs_per_clip"] = np.array(codes.shape[-1])
+    np.savez_compressed(path, **arrays)
+
+
+def load_design(path):
+    """Load a design saved by save_design, unpacking the answer codes."""
+    with np.load(path) as data:
+        design = {key: data[key] for key in data.files}
+    packed = design.pop("codes_packed")
+    n_pairs = int(design.pop("pairs_per_clip"))
+    n_clips = design["orders"].shape[-1]
+    codes = np.unpackbits(packed, axis=-1, count=n_clips * n_pairs).astype(bool)
+    design["codes"] = codes.reshape(*packed.shape[:2], n_clips, n_pairs)
+    return design
+
+
+def as_number(value):
+    """Turn a stored frequency back into an int when it is whole (so file names read 4994, not 4994.0)."""
+    return int(value) if float(value).is_integer() else float(value)
+
+
+def participant_keys(design, participant):
+    """
+    Answer keys of one participant in presentation order, in the format used by judge.py.
+
+    Returns:
+        List of {'p': pattern, 'f': comparison frequency, 'c': center frequency}
+    """
+    keys = []
+    for condition, center in enumerate(design["centers"]):
+        orders = design["orders"][participant, condition]
+        patterns = stimulus_engine.code_strings(design["codes"][participant, condition])
+        for clip, pattern in zip(orders, patterns):
+            keys.append({'p': pattern, 'f': as_number(design["comp_freqs"][condition, clip]), 'c': as_number(center)})
+    return keys
+
+
+def write_participant_stimuli(design, participant, output_dir, store_dir=None, audio_format="wav"):
+    """Render the stimuli and record CSV of one participant into output_dir."""
+    os.makedirs(output_dir, exist_ok=True)
+    rows = []
+    for condition, (center, group) in enumerate(zip(design["centers"], design["groups"])):
+        orders = design["orders"][participant, condition]
+        freq_pool = [as_number(f) for f in design["comp_freqs"][condition, orders]]
+        condition_rows = make_audio_record.generate_condition(
+            as_number(center), None, len(freq_pool), str(group), output_dir, store_dir=store_dir,
+            audio_format=audio_format, freq_pool=freq_pool, codes=design["codes"][participant, condition])
+        rows.extend([str(group)] + row for row in condition_rows)
+    record_path = os.path.join(output_dir, f"participant_{participant}_result_record.csv")
+    make_audio_record.write_record(record_path, rows, ["Group"] + make_audio_record.CSV_HEADERS)
+    return record_path
+
+
+def main(participant=None):
+    if participant is None:
+        design = generate_design()
+        save_design(DESIGN_PATH, design)
+        codes = design["codes"]
+        print(f"Design saved to: {DESIGN_PATH} ({os.path.getsize(DESIGN_PATH) / 1024:.1f} KB)")
+        print(f"{codes.shape[0]} participants x {codes.shape[1]} conditions x {codes.shape[2]} clips, "
+              f"balanced={BALANCED}, max run={MAX_RUN}")
+    else:
+        design = load_design(DESIGN_PATH)
+        record_path = write_participant_stimuli(design, participant, os.path.join("MPC_Audio", f"p{participant}"))
+        print(f"Stimuli for participant {participant} written; record: {record_path}")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else None)
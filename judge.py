@@ -2,7 +2,12 @@ import pandas as pd
 import re
 
 
-def process_survey_scoring_grouped(file_path):
+def process_survey_scoring_grouped(file_path, design_path=None, bank_path=None):
+    # If design_path is given (a design file from design_generator.py), each participant is
+    # scored with their own answer keys instead of the fixed keys below; the i-th response
+    # row is taken to be participant i of the design.
+    # If bank_path is given (a stimulus bank from make_audio_batch.py), the answer keys are read
+    # from the bank, in bank order, instead of the fixed keys below.
     # ==========================
     # 1. Define Answer Keys
     # ==========================
@@ -78,8 +83,22 @@ def process_survey_scoring_grouped(file_path):
     data_df = df.iloc[1:].copy()  # Skip the header row if necessary
     processed_rows = []
 
-    for idx, row in data_df.iterrows():
+    # The design and bank readers pull in the synthesis stack, so they are only imported when used
+    design = None
+    if design_path:
+        import design_generator
+        design = design_generator.load_design(design_path)
+        if len(data_df) > design["orders"].shape[0]:
+            raise ValueError(f"{len(data_df)} response rows but the design in {design_path} has only "
+                             f"{design['orders'].shape[0]} participants")
+    if bank_path:
+        import stimulus_bank
+        with stimulus_bank.StimulusBank(bank_path) as bank:
+            all_keys = bank.answer_keys()
+
+    for participant, (idx, row) in enumerate(data_df.iterrows()):
         user_record = {}
+        keys = all_keys if design is None else design_generator.participant_keys(design, participant)
 
         # A. Extract Metadata
         for cn in metadata_translation:
@@ -109,9 +128,9 @@ def process_survey_scoring_grouped(file_path):
 
         # C. Scoring
         for i, block_name in enumerate(audio_blocks):
-            if i >= len(all_keys): break
+            if i >= len(keys): break
 
-            key_info = all_keys[i]
+            key_info = keys[i]
             correct_pattern = key_info['p']
             delta = abs(key_info['f'] - key_info['c'])  # Calculate frequency difference (Delta)
             center_freq = key_info['c']
@@ -178,6 +197,8 @@ def process_survey_scoring_grouped(file_path):
 
 # === Execution and Saving ===
 file_path = '59a388032ed94d8db10f69c217cea8da.csv'
-df_final = process_survey_scoring_grouped(file_path)
+design_path = None  # e.g. 'design.npz' when participants received per-participant orders
+bank_path = None  # e.g. 'MPC_Audio/batch.bank' to take the answer keys from a stimulus bank
+df_final = process_survey_scoring_grouped(file_path, design_path, bank_path)
 df_final.to_csv('final_scored_grouped.csv', index=False, encoding='utf-8-sig')
 print("Processing complete.")
\ No newline at end of file
@@ -0,0 +1,102 @@
+import random
+import sys
+import threading
+import time
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+import stimulus_engine
+import stimulus_server
+
+# ==========================================
+# ## Parameter Definitions (User Configuration)
+# ==========================================
+
+BASE_URL = None  # e.g. "http://127.0.0.1:8000"; None starts a local server for the test
+NUM_REQUESTS = 2000  # Total number of requests
+CONCURRENCY = 16  # Number of concurrent clients
+CENTER_FREQS = [200, 1000, 5000]  # Centers drawn from
+NUM_COMPARISONS = 10  # Comparison frequencies per center (1 Hz apart)
+RANGE_FRACTION = 0.2  # Fraction of requests that ask for a byte range
+SEED = 0  # Seed for the request mix
+
+
+# ==========================================
+# ## Core Logic
+# ==========================================
+
+def make_requests(num_requests, seed=SEED):
+    """Draw a reproducible mix of (url path, Range header) requests."""
+    rng = random.Random(seed)
+    requests = []
+    for _ in range(num_requests):
+        center = rng.choice(CENTER_FREQS)
+        comp = center - rng.randint(1, NUM_COMPARISONS)
+        code = "".join(rng.choice("FS") for _ in range(stimulus_engine.PAIRS_PER_CLIP))
+        byte_range = None
+        if rng.random() < RANGE_FRACTION:
+            start = rng.randint(0, 100000)
+            byte_range = f"bytes={start}-{start + 65535}"
+        requests.append((f"/stimulus?center={center}&comp={comp}&code={code}", byte_range))
+    return requests
+
+
+def fetch(base_url, path, byte_range):
+    """Fetch one stimulus and return (latency in seconds, bytes received)."""
+    request = urllib.request.Request(base_url + path)
+    if byte_range:
+        request.add_header("Range", byte_range)
+    start = time.perf_counter()
+    with urllib.request.urlopen(request) as response:
+        size = len(response.read())
+    return time.perf_counter() - start, size
+
+
+def run_load(base_url, requests, concurrency=CONCURRENCY):
+    """Replay the requests with a pool of concurrent clients and summarize the results."""
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        results = list(pool.map(lambda request: fetch(base_url, *request), requests))
+    wall_time = time.perf_counter() - start
+
+    latencies = np.array([latency for latency, _ in results]) * 1000
+    total_bytes = sum(size for _, size in results)
+    return {
+        "requests": len(results),
+        "concurrency": concurrency,
+        "wall_time_s": round(wall_time, 3),
+        "requests_per_s": round(len(results) / wall_time, 1),
+        "mb_per_s": round(total_bytes / wall_time / 1e6, 2),
+        "latency_ms_p50": round(float(np.percentile(latencies, 50)), 2),
+        "latency_ms_p95": round(float(np.percentile(latencies, 95)), 2),
+        "latency_ms_p99": round(float(np.percentile(latencies, 99)), 2),
+        "latency_ms_max": round(float(latencies.max()), 2),
+    }
+
+
+def main(base_url=BASE_URL):
+    server = None
+    if base_url is None:
+        server = stimulus_server.make_server(port=0)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        base_url = f"http://{server.server_address[0]}:{server.server_address[1]}"
+        print(f"Started local server at {base_url}")
+
+    requests = make_requests(NUM_REQUESTS)
+    # First pass mostly misses the response cache; second pass replays the same mix
+    for label in ("cold", "warm"):
+        summary = run_load(base_url, requests)
+        print(f"[{label}] {summary}")
+
+    with urllib.request.urlopen(base_url + "/stats") as response:
+        print(f"Server cache: {response.read().decode()}")
+
+    if server is not None:
+        server.shutdown()
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main(sys.argv[1] if len(sys.argv) > 1 else BASE_URL)
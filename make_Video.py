@@ -1,45 +1,543 @@
+import hashlib
+import json
 import os
+import random
 import subprocess
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
 
-def combine_wav_and_png_to_mp4(wav_folder, png_path, output_folder):
+import numpy as np
+from scipy.io import wavfile
+
+import make_audio_record
+import stimulus_store
+
+# Scheduler settings
+MAX_WORKERS = os.cpu_count() or 1  # Number of ffmpeg processes running at the same time
+FFMPEG_THREADS = None  # Threads per ffmpeg process; None splits the cores evenly between the workers
+MAX_RETRIES = 2  # Extra attempts for a conversion that fails
+RETRY_DELAY = 1.0  # Seconds to wait before retrying a failed conversion
+
+# Still-image reuse
+REUSE_STILL = True  # Encode the image once and stream-copy it into every MP4 (only the audio is encoded per file)
+STILL_SECONDS = 1  # Length of the pre-encoded still segment that is looped
+STILL_FPS = 25  # Frame rate of the still segment
+
+# Incremental builds
+MANIFEST_NAME = "mp4_manifest.json"  # Records the inputs each MP4 was built from, in the output folder
+LOG_NAME = "mp4_build_log.json"  # Per-job timing and ffmpeg progress stats of the last run, in the output folder
+
+EVEN_SIZE_FILTER = "scale=trunc(iw/2)*2:trunc(ih/2)*2"  # H.264 with yuv420p needs even dimensions
+
+
+def build_command(wav_path, png_path, output_path, threads, seconds):
+    """
+    Build the FFmpeg command that turns one WAV and a still image into an MP4.
+
+    With -shortest alone the looped image can run past the audio by the
+    frames x264 still holds in its lookahead, so the output is also cut to
+    the audio length with -t.
+
+    :param threads: Thread limit of this ffmpeg process
+    :param seconds: Duration of the WAV (see wav_seconds)
+    """
+    return [
+        "ffmpeg",
+        "-y",                             # Overwrite: a worker must never wait on a prompt
+        "-loglevel", "error",             # Parallel jobs would interleave the progress output
+        "-loop", "1",                     # Loop the static image
+        "-i", png_path,                   # Input image
+        "-i", wav_path,                   # Input audio
+        "-vf", EVEN_SIZE_FILTER,          # Odd-sized images cannot be encoded as yuv420p
+        "-c:v", "libx264",                # Video codec
+        "-tune", "stillimage",            # Optimize for still images
+        "-c:a", "aac",                    # Audio codec
+        "-b:a", "192k",                   # Audio bitrate
+        "-pix_fmt", "yuv420p",            # Widely supported pixel format
+        "-t", str(seconds),               # Cut the looped image at the audio length ...
+        "-shortest",                      # ... and match video length to audio
+        "-movflags", "+faststart",        # Index at the front for web playback
+        "-threads", str(threads),         # Limit threads so parallel jobs do not oversubscribe the cores
+        output_path                       # Output file path
+    ]
+
+
+def build_still_command(png_path, segment_path, seconds=STILL_SECONDS, fps=STILL_FPS):
+    """
+    Build the FFmpeg command that encodes the image once into a short, loopable H.264 segment.
+
+    The segment is a single GOP (one keyframe), so looping it with stream copy
+    always restarts on a keyframe. yuv420p and even dimensions keep it playable
+    by browsers and upload platforms.
+    """
+    return [
+        "ffmpeg",
+        "-y",
+        "-loglevel", "error",
+        "-loop", "1",                     # Loop the static image
+        "-i", png_path,                   # Input image
+        "-t", str(seconds),               # Segment length
+        "-r", str(fps),                   # Constant frame rate
+        "-vf", EVEN_SIZE_FILTER,          # H.264 with yuv420p needs even dimensions
+        "-c:v", "libx264",                # Video codec
+        "-tune", "stillimage",            # Optimize for still images
+        "-pix_fmt", "yuv420p",            # Widely supported pixel format
+        "-g", str(seconds * fps),         # One keyframe per segment
+        "-an",                            # No audio in the segment
+        segment_path
+    ]
+
+
+def build_copy_command(wav_path, segment_path, output_path, threads, seconds):
+    """
+    Build the FFmpeg command that loops the pre-encoded segment and only encodes the audio.
+
+    -shortest alone does not stop an endlessly looped input that is
+    stream-copied, so the output is also cut to the audio length with -t.
+
+    :param threads: Thread limit of this ffmpeg process
+    :param seconds: Duration of the WAV (see wav_seconds)
+    """
+    return [
+        "ffmpeg",
+        "-y",
+        "-loglevel", "error",
+        "-stream_loop", "-1",             # Loop the still segment
+        "-i", segment_path,               # Pre-encoded video
+        "-i", wav_path,                   # Input audio
+        "-map", "0:v:0",
+        "-map", "1:a:0",
+        "-c:v", "copy",                   # No video re-encode
+        "-c:a", "aac",                    # Audio codec
+        "-b:a", "192k",                   # Audio bitrate
+        "-t", str(seconds),               # Cut the endless loop at the audio length ...
+        "-shortest",                      # ... and end the streams together
+        "-movflags", "+faststart",        # Index at the front for web playback
+        "-threads", str(threads),
+        output_path
+    ]
+
+
+def wav_seconds(wav_path):
+    """Duration of a WAV file, from its header (the samples are memory-mapped, not read)."""
+    sample_rate, data = wavfile.read(wav_path, mmap=True)
+    return len(data) / sample_rate
+
+
+def build_pipe_command(output_path, sample_rate, threads, seconds, png_path=None, segment_path=None):
+    """
+    Build the FFmpeg command that reads raw 16-bit mono PCM from stdin and muxes it with the image.
+
+    :param seconds: Duration of the piped audio (cuts the looped still, see build_copy_command)
+    :param png_path: Image to encode as the video track (used when segment_path is None)
+    :param segment_path: Pre-encoded still segment to loop with stream copy
+    """
+    if segment_path:
+        video_input = ["-stream_loop", "-1", "-i", segment_path]
+        video_codec = ["-c:v", "copy"]
+    else:
+        video_input = ["-loop", "1", "-i", png_path]
+        video_codec = ["-vf", EVEN_SIZE_FILTER, "-c:v", "libx264", "-tune", "stillimage", "-pix_fmt", "yuv420p"]
+    return [
+        "ffmpeg",
+        "-y",
+        "-loglevel", "error",
+        *video_input,
+        "-f", "s16le",                    # Raw little-endian 16-bit PCM ...
+        "-ar", str(sample_rate),          # ... at the stimulus sampling rate ...
+        "-ac", "1",                       # ... mono ...
+        "-i", "pipe:0",                   # ... from stdin
+        "-map", "0:v:0",
+        "-map", "1:a:0",
+        *video_codec,
+        "-c:a", "aac",                    # Audio codec
+        "-b:a", "192k",                   # Audio bitrate
+        "-t", str(seconds),               # Cut the looped still at the audio length ...
+        "-shortest",                      # ... and end the streams together
+        "-movflags", "+faststart",        # Index at the front for web playback
+        "-threads", str(threads),
+        output_path
+    ]
+
+
+class ProgressBoard:
+    """
+    Aggregate `-progress` reports of all running ffmpeg jobs into one live status line.
+
+    Jobs call update() with their latest parsed report; the line shows
+    finished/total jobs, media seconds encoded so far and the combined
+    speed relative to real time, redrawn at most every `interval` seconds.
+    """
+
+    def __init__(self, total_jobs, interval=0.5):
+        self.total_jobs = total_jobs
+        self.interval = interval
+        self.finished = 0
+        self.encoded = {}  # job name -> media seconds written
+        self.start = time.perf_counter()
+        self.last_draw = 0.0
+        self.lock = threading.Lock()
+
+    def update(self, name, report):
+        with self.lock:
+            self.encoded[name] = report.get("out_time_seconds", 0.0)
+            self.draw()
+
+    def job_done(self, message):
+        with self.lock:
+            self.finished += 1
+            print(f"\r{message:<100}")
+            self.draw(force=True)
+
+    def draw(self, force=False):
+        now = time.perf_counter()
+        if not force and now - self.last_draw < self.interval:
+            return
+        self.last_draw = now
+        elapsed = now - self.start
+        encoded = sum(self.encoded.values())
+        line = (f"[{self.finished}/{self.total_jobs}] {encoded:.1f}s of media encoded in {elapsed:.1f}s "
+                f"({encoded / elapsed if elapsed else 0:.1f}x realtime)")
+        print(f"\r{line:<100}", end="", flush=True)
+
+
+def parse_progress(block):
+    """
+    Turn one block of ffmpeg `-progress` key=value lines into typed fields.
+
+    :return: Dict with frame, fps, bitrate_kbps, total_size, out_time_seconds, speed and progress
+    """
+    def number(value):
+        try:
+            return float(value)
+        except (TypeError, ValueError):
+            return None  # "N/A" while ffmpeg has no value yet
+
+    report = {"progress": block.get("progress")}
+    report["frame"] = int(number(block.get("frame")) or 0)
+    report["fps"] = number(block.get("fps"))
+    report["bitrate_kbps"] = number(block.get("bitrate", "").replace("kbits/s", ""))
+    report["total_size"] = int(number(block.get("total_size")) or 0)
+    out_time_us = number(block.get("out_time_us", block.get("out_time_ms")))  # Both are microseconds
+    report["out_time_seconds"] = out_time_us / 1e6 if out_time_us is not None else 0.0
+    report["speed"] = number(block.get("speed", "").rstrip("x"))
+    return report
+
+
+def run_ffmpeg(command, input_bytes=None, on_progress=None):
+    """
+    Run ffmpeg with machine-readable progress on stdout.
+
+    stdin (if any) is fed and stderr drained on helper threads, so neither
+    pipe can fill up and block ffmpeg while its progress is being read.
+
+    :param on_progress: Called with each parsed progress report
+    :return: (return code, stderr text, last progress report)
+    """
+    command = command[:1] + ["-progress", "pipe:1", "-nostats"] + command[1:]
+    process = subprocess.Popen(command, stdin=subprocess.PIPE if input_bytes is not None else subprocess.DEVNULL,
+                               stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+    stderr = []
+    helpers = [threading.Thread(target=lambda: stderr.append(process.stderr.read()), daemon=True)]
+    if input_bytes is not None:
+        def feed():
+            try:
+                process.stdin.write(input_bytes)
+                process.stdin.close()
+            except OSError:
+                pass  # ffmpeg exited early; its return code and stderr say why
+        helpers.append(threading.Thread(target=feed, daemon=True))
+    for helper in helpers:
+        helper.start()
+
+    report, block = {}, {}
+    for line in process.stdout:
+        key, _, value = line.decode(errors="replace").strip().partition("=")
+        block[key] = value
+        if key == "progress":  # Last key of every report
+            report = parse_progress(block)
+            block = {}
+            if on_progress:
+                on_progress(report)
+    process.wait()
+    for helper in helpers:
+        helper.join()
+    return process.returncode, b"".join(stderr).decode(errors="replace"), report
+
+
+def run_job(name, command, retries=MAX_RETRIES, retry_delay=RETRY_DELAY, input_bytes=None, board=None):
+    """
+    Run one ffmpeg command, retrying on failure.
+
+    :param input_bytes: Data written to ffmpeg's stdin (e.g. raw PCM), resent on every attempt
+    :param board: ProgressBoard that receives the job's progress reports
+    :return: Dict with the file name, seconds spent, attempts, the last error (None on success)
+             and the final frame, fps, bitrate_kbps, total_size, out_time_seconds and speed
+    """
+    start = time.perf_counter()
+    error = None
+    report = {}
+    on_progress = (lambda r: board.update(name, r)) if board else None
+    for attempt in range(1, retries + 2):
+        try:
+            returncode, stderr, report = run_ffmpeg(command, input_bytes, on_progress)
+        except OSError as e:
+            error = str(e)  # e.g. ffmpeg not installed; retrying will not help
+            break
+        if returncode == 0:
+            error = None
+            break
+        lines = stderr.strip().splitlines()
+        error = lines[-1] if lines else f"exit status {returncode}"
+        if attempt <= retries:
+            print(f"\rRetrying {name} (attempt {attempt + 1}): {error}")
+            time.sleep(retry_delay)
+    result = {"name": name, "seconds": time.perf_counter() - start, "attempts": attempt, "error": error}
+    result.update({key: value for key, value in report.items() if key != "progress"})
+    return result
+
+
+def run_jobs(jobs, max_workers=MAX_WORKERS, retries=MAX_RETRIES):
+    """
+    Run (name, command) or (name, command, stdin bytes) jobs on a bounded pool of worker threads.
+
+    Each worker only waits on its ffmpeg process, so threads are enough;
+    max_workers bounds how many ffmpeg processes run at once. A live line
+    shows the aggregate progress of all jobs.
+
+    :return: One result dict per job (see run_job), in completion order
+    """
+    results = []
+    board = ProgressBoard(len(jobs))
+    with ThreadPoolExecutor(max_workers=max_workers) as pool:
+        futures = [pool.submit(run_job, name, command, retries, input_bytes=data[0] if data else None, board=board)
+                   for name, command, *data in jobs]
+        for future in as_completed(futures):
+            result = future.result()
+            status = "Failed" if result["error"] else "Finished"
+            speed = f", {result['speed']:.1f}x" if result.get("speed") else ""
+            board.job_done(f"{status}: {result['name']} ({result['seconds']:.1f}s{speed})")
+            results.append(result)
+    print()
+    return results
+
+
+def write_log(log_path, results, wall_time, max_workers, threads):
+    """Write the structured JSON log of a conversion run (one entry per job, plus run totals)."""
+    log = {
+        "wall_seconds": round(wall_time, 3),
+        "workers": max_workers,
+        "ffmpeg_threads": threads,
+        "jobs": sorted(results, key=lambda r: r["name"]),
+    }
+    with open(log_path, "w", encoding="utf-8") as f:
+        json.dump(log, f, indent=2)
+
+
+def print_summary(results, wall_time, max_workers):
+    """Print wall time, per-file times and failures of a conversion run."""
+    failures = [r for r in results if r["error"]]
+    busy = sum(r["seconds"] for r in results)
+    print("-" * 30)
+    for r in sorted(results, key=lambda r: r["name"]):
+        retried = f", {r['attempts']} attempts" if r["attempts"] > 1 else ""
+        print(f"{r['name']}: {r['seconds']:.2f}s{retried}{' FAILED' if r['error'] else ''}")
+    print(f"{len(results) - len(failures)}/{len(results)} converted in {wall_time:.2f}s wall time "
+          f"({busy:.2f}s of conversion time on {max_workers} workers)")
+    for r in failures:
+        print(f"FAILED {r['name']}: {r['error']}")
+
+
+def thread_count(ffmpeg_threads, max_workers):
+    """Threads per ffmpeg process: ffmpeg_threads if set, else the cores split evenly between the workers."""
+    return ffmpeg_threads or max(1, (os.cpu_count() or 1) // max_workers)
+
+
+def encoder_settings(reuse_still):
+    """Hash of the ffmpeg commands with placeholder paths, so any change of codec options invalidates outputs."""
+    if reuse_still:
+        commands = [build_still_command("{png}", "{segment}"),
+                    build_copy_command("{wav}", "{segment}", "{output}", "{threads}", "{seconds}")]
+    else:
+        commands = [build_command("{wav}", "{png}", "{output}", "{threads}", "{seconds}")]
+    return hashlib.sha256(json.dumps(commands).encode()).hexdigest()
+
+
+def output_names(wav_files):
+    """
+    Map each WAV to its MP4 name ([:26] of the stem), failing up front if two WAVs would share one.
+
+    :return: Dict of WAV file name -> MP4 file name
+    """
+    names = {wav_file: os.path.splitext(wav_file)[0][:26] + ".mp4" for wav_file in wav_files}
+    sources = {}
+    for wav_file, output_name in names.items():
+        sources.setdefault(output_name, []).append(wav_file)
+    collisions = {name: files for name, files in sources.items() if len(files) > 1}
+    if collisions:
+        details = "; ".join(f"{name} <- {', '.join(files)}" for name, files in sorted(collisions.items()))
+        raise ValueError(f"Output name collisions after truncating to 26 characters: {details}")
+    return names
+
+
+def load_manifest(manifest_path):
+    if os.path.exists(manifest_path):
+        with open(manifest_path, encoding="utf-8") as f:
+            return json.load(f)
+    return {}
+
+
+def save_manifest(manifest_path, manifest):
+    """Write the manifest atomically, so an interrupted run never leaves it half written."""
+    temp_path = manifest_path + ".tmp"
+    with open(temp_path, "w", encoding="utf-8") as f:
+        json.dump(manifest, f, indent=2, sort_keys=True)
+    os.replace(temp_path, manifest_path)
+
+
+def combine_wav_and_png_to_mp4(wav_folder, png_path, output_folder, max_workers=MAX_WORKERS,
+                               ffmpeg_threads=FFMPEG_THREADS, retries=MAX_RETRIES, reuse_still=REUSE_STILL,
+                               force=False):
     """
     Batch combine WAV files with a PNG image into MP4 files.
 
+    Only WAVs that are new or changed since the last run are converted: the
+    manifest in the output folder records the WAV, PNG and encoder-settings
+    hashes each MP4 was built from.
+
     :param wav_folder: Path to the folder containing WAV files
     :param png_path: Path to the PNG image
     :param output_folder: Path to the folder for output MP4 files
+    :param max_workers: Number of conversions running at the same time
+    :param ffmpeg_threads: Threads per ffmpeg process (None splits the cores between the workers)
+    :param retries: Extra attempts for a failed conversion
+    :param reuse_still: Encode the image once and stream-copy it into every MP4
+    :param force: Convert every WAV even if its MP4 is up to date
+    :return: One result dict per converted WAV file (see run_job), also written to the build log
     """
     # Ensure the output folder exists
     os.makedirs(output_folder, exist_ok=True)
+    threads = thread_count(ffmpeg_threads, max_workers)
+
+    # Name every output and detect collisions before converting anything
+    wav_files = sorted(f for f in os.listdir(wav_folder) if f.lower().endswith(".wav"))
+    names = output_names(wav_files)
+
+    start = time.perf_counter()
+    manifest_path = os.path.join(output_folder, MANIFEST_NAME)
+    manifest = load_manifest(manifest_path)
+    png_hash = stimulus_store.file_hash(png_path)
+    inputs = {wav_file: {"wav": wav_file, "wav_hash": stimulus_store.file_hash(os.path.join(wav_folder, wav_file)),
+                         "png_hash": png_hash}
+              for wav_file in wav_files}
 
-    # Iterate through all WAV files in the input folder
-    for wav_file in os.listdir(wav_folder):
-        if wav_file.lower().endswith(".wav"):  # Ensure only WAV files are processed
+    def up_to_date(wav_file, settings):
+        entry = manifest.get(names[wav_file])
+        return (not force and entry is not None and os.path.exists(os.path.join(output_folder, names[wav_file]))
+                and entry == dict(inputs[wav_file], settings=settings))
+
+    pending = [f for f in wav_files if not up_to_date(f, encoder_settings(reuse_still))]
+    print(f"{len(wav_files) - len(pending)} of {len(wav_files)} MP4s are up to date")
+    if not pending:
+        return []
+
+    with tempfile.TemporaryDirectory() as temp_dir:
+        segment_path = None
+        if reuse_still:
+            # Encode the still once; every job then only encodes its audio
+            segment_path = os.path.join(temp_dir, "still.mp4")
+            still = run_job("still segment", build_still_command(png_path, segment_path), retries)
+            if still["error"]:
+                print(f"Could not encode the still segment ({still['error']}); encoding the image per file")
+                segment_path = None
+            else:
+                print(f"Encoded still segment in {still['seconds']:.2f}s")
+        settings = encoder_settings(segment_path is not None)
+
+        # Build one job per new or changed WAV file
+        jobs = []
+        for wav_file in pending:
             wav_path = os.path.join(wav_folder, wav_file)
-            output_name = os.path.splitext(wav_file)[0][:26] + ".mp4"  # Replace .wav with .mp4
-            output_path = os.path.join(output_folder, output_name)
-
-            # Build the FFmpeg command
-            command = [
-                "ffmpeg",
-                "-loop", "1",                    # Loop the static image
-                "-i", png_path,                   # Input image
-                "-i", wav_path,                   # Input audio
-                "-c:v", "libx264",                # Video codec
-                "-tune", "stillimage",            # Optimize for still images
-                "-c:a", "aac",                    # Audio codec
-                "-b:a", "192k",                   # Audio bitrate
-                "-shortest",                      # Match video length to audio
-                output_path                       # Output file path
-            ]
-
-            # Execute the FFmpeg command
-            try:
-                print(f"Processing: {wav_file}")
-                subprocess.run(command, check=True)
-                print(f"Finished: {output_name}")
-            except subprocess.CalledProcessError as e:
-                print(f"Error processing {wav_file}: {e}")
+            output_path = os.path.join(output_folder, names[wav_file])
+            manifest.pop(names[wav_file], None)  # Invalid until this conversion succeeds
+            if segment_path:
+                command = build_copy_command(wav_path, segment_path, output_path, threads, wav_seconds(wav_path))
+            else:
+                command = build_command(wav_path, png_path, output_path, threads, wav_seconds(wav_path))
+            jobs.append((wav_file, command))
+        save_manifest(manifest_path, manifest)
+
+        print(f"Converting {len(jobs)} files on {max_workers} workers ({threads} ffmpeg thread(s) each)")
+        results = run_jobs(jobs, max_workers, retries)
+        for result in results:
+            if not result["error"]:
+                manifest[names[result["name"]]] = dict(inputs[result["name"]], settings=settings)
+        save_manifest(manifest_path, manifest)
+        wall_time = time.perf_counter() - start
+        print_summary(results, wall_time, max_workers)
+        write_log(os.path.join(output_folder, LOG_NAME), results, wall_time, max_workers, threads)
+    return results
+
+def stimuli_to_mp4(center_freq, step_hz, num_pairs, group_name, png_path, output_folder, rng=random,
+                   max_workers=MAX_WORKERS, ffmpeg_threads=FFMPEG_THREADS, retries=MAX_RETRIES,
+                   reuse_still=REUSE_STILL):
+    """
+    Synthesize one condition and stream each clip into ffmpeg, without writing WAV files.
+
+    Clips are rendered as 16-bit PCM with make_audio_record and piped to
+    ffmpeg over stdin as raw s16le; the answer-key record CSV is written as
+    usual (with the MP4 file names), so scoring keeps working.
+
+    :param center_freq: Center frequency (Hz)
+    :param step_hz: Step between comparison frequencies (Hz)
+    :param num_pairs: Number of clips
+    :param group_name: Group name used in the file names
+    :param png_path: Path to the PNG image
+    :param output_folder: Path to the folder for output MP4 files and the record CSV
+    :return: Path of the record CSV
+    :raises RuntimeError: If any clip fails to convert (the record CSV is then not written)
+    """
+    os.makedirs(output_folder, exist_ok=True)
+    threads = thread_count(ffmpeg_threads, max_workers)
+    freq_pool, codes, answer_codes, filenames = make_audio_record.plan_condition(center_freq, step_hz, num_pairs,
+                                                                                 group_name, rng)
+    names = output_names(filenames)
+    clips = make_audio_record.render_batch(center_freq, freq_pool, codes, dtype=np.int16)
+
+    with tempfile.TemporaryDirectory() as temp_dir:
+        start = time.perf_counter()
+        segment_path = None
+        if reuse_still:
+            segment_path = os.path.join(temp_dir, "still.mp4")
+            if run_job("still segment", build_still_command(png_path, segment_path), retries)["error"]:
+                segment_path = None
+
+        jobs = []
+        for filename, audio in zip(filenames, clips):
+            output_path = os.path.join(output_folder, names[filename])
+            command = build_pipe_command(output_path, make_audio_record.SAMPLE_RATE, threads,
+                                         len(audio) / make_audio_record.SAMPLE_RATE, png_path, segment_path)
+            jobs.append((names[filename], command, audio.astype("<i2", copy=False).tobytes()))
+
+        print(f"Converting {len(jobs)} clips on {max_workers} workers ({threads} ffmpeg thread(s) each)")
+        results = run_jobs(jobs, max_workers, retries)
+        wall_time = time.perf_counter() - start
+        print_summary(results, wall_time, max_workers)
+        write_log(os.path.join(output_folder, LOG_NAME), results, wall_time, max_workers, threads)
+
+    # A record listing missing videos would misalign the answer keys, so none is written
+    failed = sorted(r["name"] for r in results if r["error"])
+    if failed:
+        raise RuntimeError(f"{len(failed)} clip(s) could not be converted, no record CSV written: {', '.join(failed)}")
+
+    csv_rows = [[names[filename], center_freq, comp_freq, answer_code]
+                for filename, comp_freq, answer_code in zip(filenames, freq_pool, answer_codes)]
+    csv_path = os.path.join(output_folder, f"{group_name}_result_record.csv")
+    make_audio_record.write_record(csv_path, csv_rows)
+    print(f"CSV file path: {csv_path}")
+    return csv_path
 
 # Main function
 if __name__ == "__main__":
@@ -49,4 +547,7 @@ if __name__ == "__main__":
     output_folder = r"D:\Python_All\Util\Master_Util\MPC\call"  # Folder for output MP4 files
 
     # Call the function
-    combine_wav_and_png_to_mp4(wav_folder, png_path, output_folder)
\ No newline at end of file
+    combine_wav_and_png_to_mp4(wav_folder, png_path, output_folder)
+
+    # Or synthesize a condition straight to MP4 without intermediate WAV files:
+    # stimuli_to_mp4(5000, 6, 10, "5000", png_path, output_folder)
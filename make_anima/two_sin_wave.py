@@ -3,6 +3,55 @@ import os
 from manim import *
 
 
+class SineWave(VMobject):
+    """
+    Sine wave A*sin(2*pi*f*(x - t)) on a pair of axes, shifted in time in place.
+
+    The curve is the same x samples axes.plot would use, joined by cubic
+    Bezier segments whose handles come from the exact derivative (Hermite
+    form). Every point's y is a fixed linear combination of cos and sin of
+    the phase, so set_time_offset rewrites the existing points with a few
+    vectorized NumPy operations instead of building a new curve per frame.
+    """
+
+    def __init__(self, axes, amplitude, frequency, x_range, **kwargs):
+        super().__init__(**kwargs)
+        self.omega = 2 * np.pi * frequency
+        x_min, x_max, step = x_range
+        x = np.append(np.arange(x_min, x_max, step), x_max)
+        start, end = x[:-1], x[1:]
+        handle = (end - start) / 3
+
+        # Points per segment: anchor, handle, handle, anchor (Manim's cubic Bezier layout)
+        origin = axes.c2p(0, 0)
+        x_scale = axes.c2p(1, 0)[0] - origin[0]
+        y_scale = axes.c2p(0, 1)[1] - origin[1]
+        xs = np.stack([start, start + handle, end - handle, end], axis=1).ravel()
+        points = np.zeros((len(xs), 3))
+        points[:, 0] = origin[0] + x_scale * xs
+        points[:, 2] = origin[2]
+        self.set_points(points)
+
+        # y = A*(sin(theta - phase) + k*cos(theta - phase)), k = signed handle length times the slope factor
+        theta = self.omega * np.stack([start, start, end, end], axis=1).ravel()
+        k = self.omega * np.stack([np.zeros_like(handle), handle, -handle, np.zeros_like(handle)], axis=1).ravel()
+        self.origin_y = origin[1]
+        self.cos_weights = y_scale * amplitude * (np.sin(theta) + k * np.cos(theta))
+        self.sin_weights = y_scale * amplitude * (np.cos(theta) - k * np.sin(theta))
+        self.phase_buffer = np.empty_like(theta)
+        self.set_time_offset(0)
+
+    def set_time_offset(self, time_offset):
+        """Redraw the wave shifted by time_offset, writing into the existing points."""
+        phase = self.omega * time_offset
+        y = self.points[:, 1]
+        np.multiply(self.cos_weights, np.cos(phase), out=y)
+        np.multiply(self.sin_weights, np.sin(phase), out=self.phase_buffer)
+        y -= self.phase_buffer
+        y += self.origin_y
+        return self
+
+
 class TwoSineWaves(Scene):
     def construct(self):
         # Define sine wave parameters
@@ -34,45 +83,19 @@ class TwoSineWaves(Scene):
         # self.add(axes_top, x_label_top, y_label_top)
         # self.add(axes_bottom, x_label_bottom, y_label_bottom)
 
-        # Define sine wave function
-        def sine_wave(x, time_offset, frequency):
-            return amplitude * np.sin(2 * np.pi * frequency * (x - time_offset))
-
-        # Create the top sine wave graph
-        graph_top = axes_top.plot(
-            lambda x: sine_wave(x, time_offset=0, frequency=3),
-            x_range=[0, 6, 0.01],
-            color=YELLOW
-        )
-
-        # Create the bottom sine wave graph
-        graph_bottom = axes_bottom.plot(
-            lambda x: sine_wave(x, time_offset=0, frequency=5),
-            x_range=[0, 6, 0.01],
-            color=GREEN
-        )
-
-        # Dynamically update the top sine wave
+        # Create the sine wave graphs (same samples as axes.plot with x_range=[0, 6, 0.01])
+        graph_top = SineWave(axes_top, amplitude, frequency=3, x_range=[0, 6, 0.01], color=YELLOW)
+        graph_bottom = SineWave(axes_bottom, amplitude, frequency=5, x_range=[0, 6, 0.01], color=GREEN)
+
+        # Dynamically update the top sine wave (shifts the existing points; nothing is rebuilt per frame)
         def update_graph_top(mob, dt):
             if self.time < 3:  # Update only during the first 3 seconds
-                mob.become(
-                    axes_top.plot(
-                        lambda x: sine_wave(x, time_offset=self.time, frequency=3),
-                        x_range=[0, 6, 0.01],
-                        color=YELLOW
-                    )
-                )
+                mob.set_time_offset(self.time)
 
         # Dynamically update the bottom sine wave
         def update_graph_bottom(mob, dt):
             if 3 <= self.time < 6:  # Update between 3 and 6 seconds
-                mob.become(
-                    axes_bottom.plot(
-                        lambda x: sine_wave(x, time_offset=self.time - 3, frequency=5),
-                        x_range=[0, 6, 0.01],
-                        color=GREEN
-                    )
-                )
+                mob.set_time_offset(self.time - 3)
 
         # Add descriptive text
         text_top = Text("First ", font_size=24, color=YELLOW).next_to(axes_top, RIGHT)
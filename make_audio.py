@@ -1,46 +1,41 @@
 import numpy as np
-from scipy.io.wavfile import write
 import random
 import os
 
+import audio_export
+import stimulus_engine
+import stimulus_store
+
 # Parameter definitions
 SAMPLE_RATE = 44100  # Sampling rate
-DURATION_200MS = int(0.2 * SAMPLE_RATE)  # 200ms duration
-DURATION_500MS = int(0.5 * SAMPLE_RATE)  # 500ms duration
-BLANK = np.zeros(DURATION_200MS)  # 200ms blank signal
+# Tone (500ms) and blank (200ms) durations are set in stimulus_engine (TONE_SECONDS, BLANK_SECONDS)
 
 def generate_sine_wave(frequency, duration):
     """Generate a sine wave with the specified frequency and duration."""
-    t = np.linspace(0, duration / SAMPLE_RATE, duration, endpoint=False)
-    return np.sin(2 * np.pi * frequency * t)
+    return stimulus_engine.TONE_CACHE.tones([frequency], duration, SAMPLE_RATE, np.float64)[0]  # Shared read-only tone
+
+def draw_orders(freq_A, freq_B):
+    """Randomly choose the playing order of each of the four pairs."""
+    return [random.choice([(freq_A, freq_B), (freq_B, freq_A)]) for _ in range(4)]  # Repeat each audio four times
+
+def render_orders(all_orders, dtype=np.float64):
+    """Render one clip per list of orders, returning the clips and their sequence descriptions (int16 dtype gives final PCM)."""
+    tone_freqs = np.array(all_orders, dtype=np.float64)  # Shape: (clips, pairs, 2)
+    clips = stimulus_engine.render_tone_matrix(tone_freqs, SAMPLE_RATE, dtype, tone_dtype=np.float64)
+    order_strs = ["".join(f"-{a:.0f}{b:.0f}-" for a, b in orders) for orders in all_orders]  # e.g. "-500480--480500-..."
+    return clips, order_strs
 
 def create_audio_for_pair(freq_A, freq_B):
     """Generate audio for a given frequency pair, returning the full audio clip and the corresponding sequence description."""
-    audio_segments = []
-    order_str_parts = []  # Store string parts of the frequency order
+    clips, order_strs = render_orders([draw_orders(freq_A, freq_B)])
+    return clips[0], order_strs[0]
 
-    for _ in range(4):  # Repeat each audio four times
-        order = random.choice([(freq_A, freq_B), (freq_B, freq_A)])  # Randomly choose frequency order
-        segment = np.concatenate([
-            BLANK,
-            generate_sine_wave(order[0], DURATION_500MS),
-            BLANK,
-            generate_sine_wave(order[1], DURATION_500MS),
-            BLANK,
-            BLANK,
-            BLANK,
-            BLANK
-        ])
-        audio_segments.append(segment)
-        order_str_parts.append(f"-{order[0]:.0f}{order[1]:.0f}-")  # Record current order
+def main(input_frequency, step, output_dir="output", num=10, store_dir=None, audio_format="wav"):
+    """Main function: Generate several frequency pairs and synthesize audio by decreasing frequency difference with a set step.
 
-    # Concatenate all audio segments
-    full_audio = np.concatenate(audio_segments)
-    order_str = "".join(order_str_parts)  # Join all orders into a string (e.g., "ABBAABAB")
-    return full_audio, order_str
-
-def main(input_frequency, step, output_dir="output", num=10):
-    """Main function: Generate several frequency pairs and synthesize audio by decreasing frequency difference with a set step."""
+    If store_dir is given, clips already in that content-addressed store are linked instead of re-synthesized.
+    audio_format is "wav" or lossless "flac" (needs the soundfile package).
+    """
     random.seed(42)  # Set random seed for reproducibility
     os.makedirs(output_dir, exist_ok=True)  # Create output directory
 
@@ -52,18 +47,31 @@ def main(input_frequency, step, output_dir="output", num=10):
         freq_B = input_frequency - diff
         frequency_pairs.append((input_frequency, freq_B))
 
-    # Synthesize audio for each frequency pair
+    # Draw the playing orders and name the files
+    all_orders = [draw_orders(freq_A, freq_B) for freq_A, freq_B in frequency_pairs]
+    all_order_strs = ["".join(f"-{a:.0f}{b:.0f}-" for a, b in orders) for orders in all_orders]
+    # Filename format: pair_index_A_freq_B_freq_order_sequence.wav (or .flac)
+    output_paths = [os.path.join(output_dir, audio_export.with_extension(
+                        f"pair_{idx + 1}_A{freq_A:.2f}_B{freq_B:.2f}_order_{order_str}.wav", audio_format))
+                    for idx, ((freq_A, freq_B), order_str) in enumerate(zip(frequency_pairs, all_order_strs))]
+
+    if store_dir is not None:
+        # Only synthesize clips missing from the store; link the rest
+        store = stimulus_store.StimulusStore(store_dir)
+        counts = store.materialize(all_orders, output_paths, SAMPLE_RATE, np.float64, audio_format=audio_format)
+        print(f"Stimulus store: {counts}")
+    else:
+        # Synthesize audio for all frequency pairs in one batch
+        all_clips, _ = render_orders(all_orders, dtype=np.int16)  # 16-bit PCM format
     for idx, (freq_A, freq_B) in enumerate(frequency_pairs):
         print(f"Processing pair {idx + 1}: A={freq_A:.2f} Hz, B={freq_B:.2f} Hz")
-        audio, order_str = create_audio_for_pair(freq_A, freq_B)
-        final_audio = np.int16(audio * 32767)  # Convert to 16-bit PCM format
-
-        # Filename format: pair_index_A_freq_B_freq_order_sequence.wav
-        output_filename = f"pair_{idx + 1}_A{freq_A:.2f}_B{freq_B:.2f}_order_{order_str}.wav"
-        output_path = os.path.join(output_dir, output_filename)
+        output_path = output_paths[idx]
+        if store_dir is None:
+            stimulus_store.release(output_path)
+            audio_export.write_audio(output_path, SAMPLE_RATE, all_clips[idx], audio_format)
+        print(f"Audio file saved to: {output_path} ({os.path.getsize(output_path) / 1024:.1f} KB)")
 
-        write(output_path, SAMPLE_RATE, final_audio)
-        print(f"Audio file saved to: {output_path}")
+    print(f"Tone cache: {stimulus_engine.TONE_CACHE.stats()}")
 
 if __name__ == "__main__":
     input_freq = float(input("Please enter the center frequency (Hz): "))
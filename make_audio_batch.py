@@ -0,0 +1,161 @@
+import csv
+import json
+import os
+import random
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+import make_audio_record
+import stimulus_bank
+
+# ==========================================
+# ## Parameter Definitions (User Configuration)
+# ==========================================
+
+# 1. Job Specification
+# One entry per condition; these are the three parts scored by judge.py.
+# A JSON file with the same list of objects can be passed on the command line instead.
+JOB_SPEC = [
+    {"center": 200, "step": 1, "num_pairs": 10, "group": "200"},
+    {"center": 1000, "step": 1, "num_pairs": 10, "group": "1000"},
+    {"center": 5000, "step": 6, "num_pairs": 10, "group": "5000"},
+]
+
+# 2. Run Parameters
+BASE_SEED = None  # Set to a fixed number to reproduce a whole batch; None draws a fresh seed
+NUM_WORKERS = os.cpu_count()  # Size of the process pool
+OUTPUT_DIR = "MPC_Audio"  # Output folder name
+AUDIO_FORMAT = "wav"  # "wav" or lossless "flac" (needs the soundfile package)
+STORE_DIR = ".stimulus_store"  # Content-addressed store shared across runs; None re-renders every clip
+BANK_NAME = None  # e.g. "batch.bank": write every clip and its answer key into one packed bank file instead
+RECORD_NAME = "batch_result_record.csv"  # Merged answer-key record
+TIMING_NAME = "batch_timing.csv"  # Per-condition timing summary
+
+
+# ==========================================
+# ## Core Logic
+# ==========================================
+
+def condition_seeds(base_seed, num_conditions):
+    """
+    Derive one independent seed per condition from the base seed.
+
+    Seeds depend only on the base seed and the condition's position in the
+    job spec, so results do not change with the number of workers.
+    """
+    children = np.random.SeedSequence(base_seed).spawn(num_conditions)
+    return [int(child.generate_state(1)[0]) for child in children]
+
+
+def run_condition(condition, seed, output_dir, store_dir=None, audio_format="wav", bank=False):
+    """
+    Generate one condition in a worker process and return its record rows and timing.
+
+    With bank=True nothing is written; the record rows are bank index rows
+    and the rendered clips are returned with them as (rows, clips).
+    """
+    start = time.perf_counter()
+    rng = random.Random(seed)
+    if bank:
+        rows, clips = make_audio_record.render_condition(condition["center"], condition["step"],
+                                                         condition["num_pairs"], condition["group"], rng)
+    else:
+        rows = make_audio_record.generate_condition(condition["center"], condition["step"], condition["num_pairs"],
+                                                    condition["group"], output_dir, rng, store_dir, audio_format)
+    elapsed = time.perf_counter() - start
+    timing = {
+        "Group": condition["group"],
+        "Center_Freq(Hz)": condition["center"],
+        "Clips": len(rows),
+        "Seed": seed,
+        "Seconds": round(elapsed, 4),
+    }
+    if bank:
+        return (rows, clips), timing
+    return [[condition["group"]] + row for row in rows], timing
+
+
+def run_batch(job_spec, base_seed=None, num_workers=NUM_WORKERS, output_dir=OUTPUT_DIR, store_dir=STORE_DIR,
+              audio_format=AUDIO_FORMAT, bank_path=None):
+    """
+    Run every condition of the job spec across a process pool.
+
+    With bank_path set, the workers only render and every clip is written
+    into that one bank file, in job spec order, instead of individual files.
+
+    Returns:
+        1. record_rows: Merged record rows, in job spec order
+        2. timings: One timing summary dict per condition, in job spec order
+    """
+    if base_seed is None:
+        base_seed = np.random.SeedSequence().entropy
+    print(f"Base seed: {base_seed}")
+
+    groups = [condition["group"] for condition in job_spec]
+    if len(set(groups)) != len(groups):
+        raise ValueError(f"Group names must be unique in the job spec: {groups}")
+
+    os.makedirs(output_dir, exist_ok=True)
+    seeds = condition_seeds(base_seed, len(job_spec))
+
+    with ProcessPoolExecutor(max_workers=num_workers) as pool:
+        futures = [pool.submit(run_condition, condition, seed, output_dir, store_dir, audio_format, bool(bank_path))
+                   for condition, seed in zip(job_spec, seeds)]
+        results = [future.result() for future in futures]
+
+    if bank_path:
+        bank_rows = [row for (rows, _), _ in results for row in rows]
+        clips = (clip for (_, condition_clips), _ in results for clip in condition_clips)
+        stimulus_bank.write_bank(bank_path, bank_rows, clips, make_audio_record.SAMPLE_RATE)
+        results = [([[row["Group"], row["Filename"], row["Center_Freq(Hz)"], row["Comp_Freq(Hz)"],
+                      row["Answer_Key(FSFF)"]] for row in rows], timing) for (rows, _), timing in results]
+
+    record_rows = [row for rows, _ in results for row in rows]
+    timings = [timing for _, timing in results]
+    return record_rows, timings
+
+
+def write_timings(csv_path, timings):
+    """Write the per-condition timing summary CSV."""
+    with open(csv_path, mode='w', newline='', encoding='utf-8') as f:
+        writer = csv.DictWriter(f, fieldnames=list(timings[0]))
+        writer.writeheader()
+        writer.writerows(timings)
+
+
+def main(job_spec_path=None):
+    job_spec = JOB_SPEC
+    if job_spec_path:
+        with open(job_spec_path, encoding='utf-8') as f:
+            job_spec = json.load(f)
+
+    start = time.perf_counter()
+    bank_path = os.path.join(OUTPUT_DIR, BANK_NAME) if BANK_NAME else None
+    record_rows, timings = run_batch(job_spec, BASE_SEED, NUM_WORKERS, OUTPUT_DIR, STORE_DIR, AUDIO_FORMAT, bank_path)
+    wall_time = time.perf_counter() - start
+
+    # With a bank, the bank holds the answer keys and the CSV is only an export of it
+    record_path = os.path.join(OUTPUT_DIR, RECORD_NAME)
+    if bank_path:
+        stimulus_bank.export_record(bank_path, record_path)
+    else:
+        make_audio_record.write_record(record_path, record_rows, ["Group"] + make_audio_record.CSV_HEADERS)
+    timing_path = os.path.join(OUTPUT_DIR, TIMING_NAME)
+    write_timings(timing_path, timings)
+
+    print("-" * 30)
+    for timing in timings:
+        print(f"Group {timing['Group']}: {timing['Clips']} clips in {timing['Seconds']:.2f}s")
+    print(f"Total: {len(record_rows)} clips from {len(job_spec)} conditions in {wall_time:.2f}s "
+          f"({NUM_WORKERS} workers)")
+    if bank_path:
+        print(f"Stimulus bank: {bank_path}")
+    print(f"Merged record: {record_path}")
+    print(f"Timing summary: {timing_path}")
+
+
+if __name__ == "__main__":
+    main(sys.argv[1] if len(sys.argv) > 1 else None)
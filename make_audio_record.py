@@ -1,18 +1,24 @@
 import numpy as np
-from scipy.io.wavfile import write
 import random
 import os
 import csv
 
+import audio_export
+import stimulus_bank
+import stimulus_engine
+import stimulus_pipeline
+import stimulus_store
+
 # ==========================================
 # ## Parameter Definitions (User Configuration)
 # ==========================================
 
 # 1. Basic Audio Parameters
 SAMPLE_RATE = 44100  # Sampling rate
-DURATION_200MS = int(0.2 * SAMPLE_RATE)  # Interval/Blank: 200ms
-DURATION_500MS = int(0.5 * SAMPLE_RATE)  # Tone duration: 500ms
-BLANK_SIGNAL = np.zeros(DURATION_200MS)  # Blank signal data
+SYNTHESIS_METHOD = "direct"  # "direct" (float64 phase + np.sin) or "recurrence" (float32 complex rotator)
+HARMONIC_AMPLITUDES = None  # e.g. [1.0, 0.5, 0.33, 0.25]: complex tones (fundamental + harmonics); None plays pure tones
+HARMONIC_PHASES = None  # Starting phase of each harmonic in radians; None uses sine phase
+# Tone (500ms) and blank (200ms) durations are set in stimulus_engine (TONE_SECONDS, BLANK_SECONDS)
 
 # 2. Experiment Parameters
 CENTER_FREQ = 5000  # Center frequency (Hz)
@@ -20,6 +26,13 @@ STEP_HZ = 6  # Step size (Hz)
 NUM_PAIRS = 10  # Number of frequency pairs to generate
 GROUP_NAME = "5000"  # Group name (used for file naming, e.g., A1.wav)
 OUTPUT_DIR = "MPC_Audio"  # Output folder name
+AUDIO_FORMAT = "wav"  # "wav" or lossless "flac" (needs the soundfile package)
+STORE_DIR = None  # Content-addressed store (e.g. ".stimulus_store") to reuse unchanged clips; None writes every file
+BANK_PATH = None  # Write all clips into one packed bank file (e.g. "MPC_Audio/5000.bank") instead of WAV files and CSV
+PIPELINED = False  # Overlap synthesis with disk writes (render one clip at a time into a bounded queue of writers)
+
+# 3. Record Parameters
+CSV_HEADERS = ["Filename", "Center_Freq(Hz)", "Comp_Freq(Hz)", "Answer_Key(FSFF)"]
 
 
 # ==========================================
@@ -28,9 +41,31 @@ OUTPUT_DIR = "MPC_Audio"  # Output folder name
 
 def generate_sine_wave(frequency, duration):
     """Generate a sine wave with specified frequency and duration."""
-    t = np.linspace(0, duration / SAMPLE_RATE, duration, endpoint=False)
     # Use float32 to prevent overflow during calculation; convert to int16 at the end
-    return np.sin(2 * np.pi * frequency * t).astype(np.float32)
+    return stimulus_engine.TONE_CACHE.tones([frequency], duration, SAMPLE_RATE, np.float32,
+                                            SYNTHESIS_METHOD)[0]  # Shared read-only tone
+
+
+def draw_codes(num_clips, rng=random):
+    """Randomly draw the F/S order of every pair, one row of booleans per clip."""
+    # Case: (center, comp) = (High, Low) -> First is Higher -> F
+    # Case: (comp, center) = (Low, High) -> Second is Higher -> S
+    return np.array([[rng.choice([True, False]) for _ in range(stimulus_engine.PAIRS_PER_CLIP)]
+                     for _ in range(num_clips)], dtype=bool)
+
+
+def tone_harmonics():
+    """The configured harmonic complex, or None for pure tones."""
+    if HARMONIC_AMPLITUDES is None:
+        return None
+    return stimulus_engine.harmonic_spec(HARMONIC_AMPLITUDES, HARMONIC_PHASES)
+
+
+def render_batch(center_freq, comp_freqs, codes, dtype=np.float64):
+    """Render one clip per comparison frequency with the batch engine (int16 dtype gives final PCM)."""
+    # Tones are synthesized in float32 and scaled to 16-bit in float64
+    return stimulus_engine.render_clips(center_freq, comp_freqs, codes, SAMPLE_RATE, dtype=dtype,
+                                        tone_dtype=np.float32, method=SYNTHESIS_METHOD, harmonics=tone_harmonics())
 
 
 def create_audio_for_pair(center_freq, comp_freq):
@@ -47,97 +82,163 @@ def create_audio_for_pair(center_freq, comp_freq):
            - F (First): The first tone is higher (High, Low)
            - S (Second): The second tone is higher (Low, High)
     """
-    audio_segments = []
-    code_str_parts = []
-
-    for _ in range(4):  # Repeat each pair 4 times
-        # Randomly decide the order
-        # Case: (center, comp) = (High, Low) -> First is Higher -> F
-        # Case: (comp, center) = (Low, High) -> Second is Higher -> S
-
-        is_first_high = random.choice([True, False])
-
-        if is_first_high:
-            freq_1, freq_2 = center_freq, comp_freq
-            code = "F"
-        else:
-            freq_1, freq_2 = comp_freq, center_freq
-            code = "S"
-
-        segment = np.concatenate([
-            BLANK_SIGNAL,
-            generate_sine_wave(freq_1, DURATION_500MS),
-            BLANK_SIGNAL,
-            generate_sine_wave(freq_2, DURATION_500MS),
-            BLANK_SIGNAL,
-            BLANK_SIGNAL,
-            BLANK_SIGNAL,
-            BLANK_SIGNAL
-        ])
-        audio_segments.append(segment)
-        code_str_parts.append(code)
-
-    full_audio = np.concatenate(audio_segments)
-    code_str = "".join(code_str_parts)
+    codes = draw_codes(1)
+    full_audio = render_batch(center_freq, [comp_freq], codes)[0]
+    code_str = stimulus_engine.code_strings(codes)[0]
     return full_audio, code_str
 
 
-def main():
-    random.seed(None)  # Set to None for true randomness on each run; set to a fixed number for reproducibility
+def plan_condition(center_freq, step_hz, num_pairs, group_name, rng=random, audio_format="wav", freq_pool=None,
+                   codes=None):
+    """
+    Draw the comparison order and answer codes of one condition and name its clips.
 
-    # 1. Prepare output directory
-    if not os.path.exists(OUTPUT_DIR):
-        os.makedirs(OUTPUT_DIR)
-        print(f"Created folder: {OUTPUT_DIR}")
-    else:
-        print(f"Using existing folder: {OUTPUT_DIR}")
+    Returns:
+        1. freq_pool: Comparison frequencies in presentation order
+        2. codes: Boolean F/S matrix, one row per clip
+        3. answer_codes: Answer code strings such as "FSFF"
+        4. filenames: Clip filenames
+    """
+    # 1. Generate frequency pool and shuffle randomly
+    if freq_pool is None:
+        # Logic: Center Frequency - (i * Step Size)
+        freq_pool = []
+        for i in range(num_pairs):
+            diff = (i + 1) * step_hz
+            current_comp_freq = center_freq - diff
+            freq_pool.append(current_comp_freq)
+
+        # Shuffle the frequency list (e.g., from [199, 198, 197] to [197, 199, 198])
+        rng.shuffle(freq_pool)
+    print(f"Generated random frequency order (comparison frequencies): {freq_pool}")
 
-    # 2. Generate frequency pool and shuffle randomly
-    # Logic: Center Frequency - (i * Step Size)
-    freq_pool = []
-    for i in range(NUM_PAIRS):
-        diff = (i + 1) * STEP_HZ
-        current_comp_freq = CENTER_FREQ - diff
-        freq_pool.append(current_comp_freq)
+    # 2. Draw answer codes and name the files
+    if codes is None:
+        codes = draw_codes(len(freq_pool), rng)
+    answer_codes = stimulus_engine.code_strings(codes)
+    # Filename: GroupName-Index-CompFreq-AnswerCode.wav (e.g., A1-1-4994-FSFF.wav)
+    filenames = [audio_export.with_extension(f"{group_name}-{idx}-{comp_freq}-{answer_code}.wav", audio_format)
+                 for idx, (comp_freq, answer_code) in enumerate(zip(freq_pool, answer_codes), 1)]
 
-    # Shuffle the frequency list (e.g., from [199, 198, 197] to [197, 199, 198])
-    random.shuffle(freq_pool)
-    print(f"Generated random frequency order (comparison frequencies): {freq_pool}")
+    return freq_pool, codes, answer_codes, filenames
 
-    # 3. Prepare CSV data
-    csv_headers = ["Filename", "Center_Freq(Hz)", "Comp_Freq(Hz)", "Answer_Key(FSFF)"]
-    csv_rows = []
 
-    # 4. Loop to generate audio files
-    print("-" * 30)
-    for idx, comp_freq in enumerate(freq_pool, 1):  # idx starts from 1
+def generate_condition(center_freq, step_hz, num_pairs, group_name, output_dir, rng=random, store_dir=None,
+                       audio_format="wav", freq_pool=None, codes=None, pipelined=False):
+    """
+    Generate all clips of one condition into output_dir.
 
-        # Generate audio and answer code
-        audio_data, answer_code = create_audio_for_pair(CENTER_FREQ, comp_freq)
-        # Filename: GroupName-Index-CompFreq-AnswerCode.wav (e.g., A1-1-4994-FSFF.wav)
-        filename = f"{GROUP_NAME}-{idx}-{comp_freq}-{answer_code}.wav"
-        filepath = os.path.join(OUTPUT_DIR, filename)
+    Args:
+        rng: Source of randomness (the `random` module or a `random.Random` instance)
+        store_dir: Content-addressed store to link unchanged clips from, or None to render and write every clip
+        audio_format: "wav" or "flac"
+        freq_pool, codes: Precomputed comparison order and answer codes (e.g. from a design file);
+            drawn from rng when None
+        pipelined: Render clips one at a time while writer threads save the previous ones (ignored with a store)
 
-        # Convert to 16-bit PCM and save
-        final_audio = np.int16(audio_data * 32767)
-        write(filepath, SAMPLE_RATE, final_audio)
+    Returns:
+        The CSV record rows of the generated clips
+    """
+    freq_pool, codes, answer_codes, filenames = plan_condition(center_freq, step_hz, num_pairs, group_name, rng,
+                                                               audio_format, freq_pool, codes)
+    filepaths = [os.path.join(output_dir, filename) for filename in filenames]
+
+    # 3. Render all clips in one batch straight into 16-bit PCM and save them,
+    #    or only render the clips missing from the store and link the rest
+    if store_dir is None and pipelined:
+        def render(idx):
+            return render_batch(center_freq, [freq_pool[idx]], codes[idx:idx + 1], dtype=np.int16)[0]
+
+        def write(idx, audio_data):
+            stimulus_store.release(filepaths[idx])
+            return audio_export.write_audio(filepaths[idx], SAMPLE_RATE, audio_data, audio_format)
+
+        stats = stimulus_pipeline.run_pipeline(range(len(filepaths)), render, write)
+        print(stimulus_pipeline.format_stats(stats))
+    elif store_dir is None:
+        all_audio = render_batch(center_freq, freq_pool, codes, dtype=np.int16)
+        for filepath, audio_data in zip(filepaths, all_audio):
+            stimulus_store.release(filepath)
+            audio_export.write_audio(filepath, SAMPLE_RATE, audio_data, audio_format)
+    else:
+        tone_freqs = stimulus_engine.codes_to_tone_freqs(center_freq, freq_pool, codes)
+        store = stimulus_store.StimulusStore(store_dir)
+        counts = store.materialize(tone_freqs, filepaths, SAMPLE_RATE, np.float32, SYNTHESIS_METHOD, audio_format,
+                                   tone_harmonics())
+        print(f"Stimulus store: {counts}")
+
+    csv_rows = []
+    total_bytes = 0
+    print("-" * 30)
+    for idx, (filename, comp_freq, answer_code) in enumerate(zip(filenames, freq_pool, answer_codes), 1):
+        size = os.path.getsize(filepaths[idx - 1])
+        total_bytes += size
 
         # Log information
-        print(f"[{idx}/{NUM_PAIRS}] Generated: {filename} | Comparison: {comp_freq:.1f}Hz | Answer: {answer_code}")
+        print(f"[{idx}/{num_pairs}] Generated: {filename} ({size / 1024:.1f} KB) | Comparison: {comp_freq:.1f}Hz "
+              f"| Answer: {answer_code}")
 
-        csv_rows.append([filename, CENTER_FREQ, comp_freq, answer_code])
+        csv_rows.append([filename, center_freq, comp_freq, answer_code])
 
-    # 5. Write to CSV file
-    csv_path = os.path.join(OUTPUT_DIR, f"{GROUP_NAME}_result_record.csv")
+    print(f"Total size: {total_bytes / 1024 / 1024:.2f} MB ({audio_format})")
+    return csv_rows
+
+
+def render_condition(center_freq, step_hz, num_pairs, group_name, rng=random, freq_pool=None, codes=None):
+    """
+    Render all clips of one condition for a stimulus bank instead of writing files.
+
+    Returns:
+        1. bank_rows: Index rows for stimulus_bank.write_bank
+        2. clips: 16-bit PCM clips, one row per bank row
+    """
+    freq_pool, codes, answer_codes, filenames = plan_condition(center_freq, step_hz, num_pairs, group_name, rng,
+                                                               freq_pool=freq_pool, codes=codes)
+    bank_rows = [{"Filename": filename, "Group": group_name, "Center_Freq(Hz)": center_freq,
+                  "Comp_Freq(Hz)": comp_freq, "Answer_Key(FSFF)": answer_code}
+                 for filename, comp_freq, answer_code in zip(filenames, freq_pool, answer_codes)]
+    return bank_rows, render_batch(center_freq, freq_pool, codes, dtype=np.int16)
+
+
+def write_record(csv_path, csv_rows, csv_headers=CSV_HEADERS):
+    """Write the answer-key record CSV."""
     with open(csv_path, mode='w', newline='', encoding='utf-8') as f:
         writer = csv.writer(f)
         writer.writerow(csv_headers)
         writer.writerows(csv_rows)
 
+
+def main():
+    random.seed(None)  # Set to None for true randomness on each run; set to a fixed number for reproducibility
+
+    # 1. Prepare output directory
+    if not os.path.exists(OUTPUT_DIR):
+        os.makedirs(OUTPUT_DIR)
+        print(f"Created folder: {OUTPUT_DIR}")
+    else:
+        print(f"Using existing folder: {OUTPUT_DIR}")
+
+    # 2. Generate audio files, or a single bank file that also holds the answer keys
+    if BANK_PATH:
+        bank_rows, clips = render_condition(CENTER_FREQ, STEP_HZ, NUM_PAIRS, GROUP_NAME)
+        stimulus_bank.write_bank(BANK_PATH, bank_rows, clips, SAMPLE_RATE)
+        print("-" * 30)
+        print(f"Processing complete! {len(bank_rows)} clips and their answer keys saved to: {BANK_PATH} "
+              f"({os.path.getsize(BANK_PATH) / 1024 / 1024:.2f} MB)")
+        return
+
+    csv_rows = generate_condition(CENTER_FREQ, STEP_HZ, NUM_PAIRS, GROUP_NAME, OUTPUT_DIR, store_dir=STORE_DIR,
+                                  audio_format=AUDIO_FORMAT, pipelined=PIPELINED)
+
+    # 3. Write to CSV file
+    csv_path = os.path.join(OUTPUT_DIR, f"{GROUP_NAME}_result_record.csv")
+    write_record(csv_path, csv_rows)
+
     print("-" * 30)
     print(f"Processing complete! All audio files and CSV records saved to: {OUTPUT_DIR}")
     print(f"CSV file path: {csv_path}")
+    print(f"Tone cache: {stimulus_engine.TONE_CACHE.stats()}")
 
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
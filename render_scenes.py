@@ -0,0 +1,178 @@
+import ast
+import glob
+import hashlib
+import importlib.util
+import json
+import multiprocessing
+import os
+import sys
+import time
+import traceback
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from make_Video import load_manifest, save_manifest
+
+# ==========================================
+# ## Parameter Definitions (User Configuration)
+# ==========================================
+
+SCENE_FILES = ["make_anima.py"] + sorted(glob.glob(os.path.join("make_anima", "*.py")))  # Searched for Scenes
+MEDIA_DIR = os.path.join("output", "videos")  # Each scene renders into its own subfolder of this
+MANIFEST_NAME = "render_manifest.json"  # Source and config hash of every rendered scene, in MEDIA_DIR
+NUM_WORKERS = os.cpu_count() or 1  # Scenes rendered at the same time (one process each)
+DEFAULT_QUALITY = "production_quality"  # Manim quality of scenes not listed below
+SCENE_QUALITY = {  # Per-scene quality, as in each file's own __main__ (Manim's default is high_quality)
+    "TwoSineWaves": "high_quality",
+    "AudioVisualization": "high_quality",
+}
+VIDEO_FORMAT = "mp4"
+
+
+# ==========================================
+# ## Discovery
+# ==========================================
+
+def find_scenes(path):
+    """
+    Names of the Scene subclasses defined in a file, found by parsing it (Manim is not imported).
+
+    A class counts as a scene if one of its bases is a Manim scene class
+    (any name ending in "Scene") or another scene defined earlier in the file.
+    """
+    with open(path, encoding="utf-8") as f:
+        tree = ast.parse(f.read(), filename=path)
+    scenes = []
+    for node in tree.body:
+        if isinstance(node, ast.ClassDef):
+            bases = [base.id if isinstance(base, ast.Name) else getattr(base, "attr", "") for base in node.bases]
+            if any(base.endswith("Scene") or base in scenes for base in bases):
+                scenes.append(node.name)
+    return scenes
+
+
+def discover(scene_files=SCENE_FILES):
+    """Map scene name -> defining file for every scene in the files; names must be unique."""
+    scenes = {}
+    for path in scene_files:
+        for name in find_scenes(path):
+            if name in scenes:
+                raise ValueError(f"Scene {name} is defined in both {scenes[name]} and {path}")
+            scenes[name] = path
+    return scenes
+
+
+def render_settings(scene_name):
+    """Manim config a scene is rendered with (media_dir is added per process)."""
+    return {"quality": SCENE_QUALITY.get(scene_name, DEFAULT_QUALITY), "format": VIDEO_FORMAT}
+
+
+def scene_hash(path, scene_name):
+    """Hash of the scene's source file and render settings; a render is reused while it is unchanged."""
+    with open(path, "rb") as f:
+        source = f.read()
+    settings = json.dumps({"scene": scene_name, **render_settings(scene_name)}, sort_keys=True)
+    return hashlib.sha256(source + settings.encode()).hexdigest()
+
+
+# ==========================================
+# ## Rendering
+# ==========================================
+
+def render_scene(path, scene_name, media_dir, settings):
+    """
+    Render one scene in the current process (run in a worker process).
+
+    The file is imported by path, so its own __main__ block does not run,
+    and the config is set with tempconfig so nothing leaks between scenes.
+
+    :return: Dict with the scene name, output file, seconds and error (None on success)
+    """
+    start = time.perf_counter()
+    try:
+        from manim import tempconfig
+
+        spec = importlib.util.spec_from_file_location(f"scene_{scene_name}", path)
+        module = importlib.util.module_from_spec(spec)
+        spec.loader.exec_module(module)
+        with tempconfig({"media_dir": media_dir, "input_file": path, **settings}):
+            scene = getattr(module, scene_name)()
+            scene.render()
+            output = str(scene.renderer.file_writer.movie_file_path)
+        error = None
+    except Exception:
+        output = None
+        error = traceback.format_exc().strip().splitlines()[-1]
+    return {"name": scene_name, "output": output, "seconds": time.perf_counter() - start, "error": error}
+
+
+def render_all(scene_names=None, scene_files=SCENE_FILES, media_dir=MEDIA_DIR, num_workers=NUM_WORKERS,
+               force=False):
+    """
+    Render scenes concurrently, one process per scene, skipping unchanged ones.
+
+    Every scene gets its own media directory (media_dir/<scene>), so
+    parallel renders never share Manim's partial-movie files or cache.
+    Workers are spawned rather than forked, so each starts with a fresh
+    Manim config.
+
+    :param scene_names: Scenes to render (None renders every discovered scene)
+    :param force: Render even if the source and settings are unchanged
+    :return: One result dict per rendered scene (see render_scene)
+    """
+    scenes = discover(scene_files)
+    unknown = set(scene_names or []) - set(scenes)
+    if unknown:
+        raise ValueError(f"Unknown scene(s): {', '.join(sorted(unknown))}; found {', '.join(sorted(scenes))}")
+    selected = {name: scenes[name] for name in (scene_names or scenes)}
+
+    os.makedirs(media_dir, exist_ok=True)
+    manifest_path = os.path.join(media_dir, MANIFEST_NAME)
+    manifest = load_manifest(manifest_path)
+    hashes = {name: scene_hash(path, name) for name, path in selected.items()}
+    pending = [name for name in selected
+               if force or manifest.get(name, {}).get("hash") != hashes[name]
+               or not os.path.exists(manifest[name].get("output", ""))]
+    for name in sorted(set(selected) - set(pending)):
+        print(f"Up to date: {name} ({manifest[name]['output']})")
+    if not pending:
+        return []
+
+    print(f"Rendering {len(pending)} scene(s) on {min(num_workers, len(pending))} worker(s)")
+    start = time.perf_counter()
+    results = []
+    context = multiprocessing.get_context("spawn")
+    with ProcessPoolExecutor(max_workers=min(num_workers, len(pending)), mp_context=context) as pool:
+        futures = [pool.submit(render_scene, selected[name], name, os.path.join(media_dir, name),
+                               render_settings(name))
+                   for name in pending]
+        for future in as_completed(futures):
+            result = future.result()
+            if result["error"]:
+                manifest.pop(result["name"], None)
+                print(f"Failed: {result['name']} ({result['seconds']:.1f}s): {result['error']}")
+            else:
+                manifest[result["name"]] = {"hash": hashes[result["name"]], "output": result["output"],
+                                            "seconds": round(result["seconds"], 3)}
+                print(f"Rendered: {result['name']} ({result['seconds']:.1f}s)")
+            save_manifest(manifest_path, manifest)
+            results.append(result)
+
+    wall_time = time.perf_counter() - start
+    busy = sum(r["seconds"] for r in results)
+    print("-" * 30)
+    for r in sorted(results, key=lambda r: r["name"]):
+        print(f"{r['name']}: {r['seconds']:.2f}s{' FAILED' if r['error'] else ''}")
+    print(f"{sum(not r['error'] for r in results)}/{len(results)} rendered in {wall_time:.2f}s wall time "
+          f"({busy:.2f}s of render time)")
+    return results
+
+
+def main(args):
+    force = "--force" in args
+    names = [arg for arg in args if arg != "--force"] or None
+    results = render_all(names, force=force)
+    return not any(r["error"] for r in results)
+
+
+if __name__ == "__main__":
+    sys.exit(0 if main(sys.argv[1:]) else 1)
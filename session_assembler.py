@@ -0,0 +1,138 @@
+import csv
+import json
+import os
+import struct
+
+import numpy as np
+from scipy.io import wavfile
+
+import stimulus_engine
+
+# ==========================================
+# ## Parameter Definitions (User Configuration)
+# ==========================================
+
+SAMPLE_RATE = 44100  # Sampling rate of the session (every WAV part must match)
+CALIBRATION_WAVS = ["calibration200HZ.wav"]  # Played first
+INSTRUCTION_WAVS = []  # Instruction audio, played after the calibration
+RECORD_CSVS = ["MPC_Audio/batch_result_record.csv"]  # Answer-key records listing the clips, in order
+GAP_SECONDS = 1.0  # Silence between parts
+SESSION_PATH = "session.wav"  # Output session WAV; the index is written next to it
+COPY_CHUNK_SAMPLES = 1 << 20  # Samples copied at a time from WAV parts
+
+
+# ==========================================
+# ## Core Logic
+# ==========================================
+
+def wav_part(path, label=None):
+    """Describe an existing 16-bit mono WAV to copy into the session."""
+    return {"kind": "wav", "label": label or os.path.basename(path), "path": path}
+
+
+def clip_part(center_freq, comp_freq, code_str, label=None):
+    """Describe a stimulus clip to render into the session."""
+    return {"kind": "clip", "label": label or f"{center_freq}-{comp_freq}-{code_str}",
+            "center_freq": center_freq, "comp_freq": comp_freq, "code": code_str}
+
+
+def clips_from_record(csv_path):
+    """Read clip parts from a make_audio_record / make_audio_batch record CSV, in file order."""
+    with open(csv_path, newline='', encoding='utf-8') as f:
+        return [clip_part(float(row["Center_Freq(Hz)"]), float(row["Comp_Freq(Hz)"]), row["Answer_Key(FSFF)"],
+                          label=row["Filename"])
+                for row in csv.DictReader(f)]
+
+
+def part_length(part, sample_rate):
+    """Number of samples a part occupies, read from the WAV header without loading the data."""
+    if part["kind"] == "clip":
+        return stimulus_engine.pair_layout(sample_rate)[2] * len(part["code"])
+    rate, data = wavfile.read(part["path"], mmap=True)
+    if rate != sample_rate or data.dtype != np.int16 or data.ndim != 1:
+        raise ValueError(f"{part['path']} must be 16-bit mono at {sample_rate} Hz "
+                         f"(got {data.dtype}, {data.ndim} channel(s) at {rate} Hz)")
+    return len(data)
+
+
+def write_wav_header(f, sample_rate, num_samples):
+    """Write a 44-byte header for 16-bit mono PCM with num_samples of data."""
+    data_bytes = num_samples * 2
+    if data_bytes + 36 > 0xFFFFFFFF:
+        raise ValueError("Session too long for a WAV file (4 GiB limit)")
+    f.write(b"RIFF" + struct.pack("<I", 36 + data_bytes) + b"WAVE")
+    f.write(b"fmt " + struct.pack("<IHHIIHH", 16, 1, 1, sample_rate, sample_rate * 2, 2, 16))
+    f.write(b"data" + struct.pack("<I", data_bytes))
+
+
+def assemble_session(parts, session_path, sample_rate=SAMPLE_RATE, gap_seconds=GAP_SECONDS):
+    """
+    Write all parts back to back into one session WAV through a memory map.
+
+    The header is written first for the known total length, then the data
+    region is filled part by part through np.memmap, so peak memory is one
+    clip (or one copy chunk) regardless of session length. Gaps are left
+    as the zero bytes of the preallocated file.
+
+    Returns:
+        The index entries (one per part) that were written to the sidecar file
+    """
+    gap = int(gap_seconds * sample_rate)
+    lengths = [part_length(part, sample_rate) for part in parts]
+    starts = np.concatenate([[0], np.cumsum(np.array(lengths) + gap)[:-1]]).astype(int) if parts else []
+    total = int(starts[-1] + lengths[-1]) if parts else 0
+
+    header_bytes = 44
+    with open(session_path, "wb") as f:
+        write_wav_header(f, sample_rate, total)
+        f.truncate(header_bytes + total * 2)  # Preallocate the (silent) data region
+
+    index = []
+    if total:
+        data = np.memmap(session_path, dtype="<i2", mode="r+", offset=header_bytes, shape=(total,))
+        for part, start, length in zip(parts, starts, lengths):
+            region = data[start:start + length]
+            if part["kind"] == "clip":
+                codes = np.array([[c == "F" for c in part["code"]]])
+                region[:] = stimulus_engine.render_clips(part["center_freq"], [part["comp_freq"]], codes, sample_rate,
+                                                         dtype=np.int16, tone_dtype=np.float32)[0]
+            else:
+                _, source = wavfile.read(part["path"], mmap=True)
+                for offset in range(0, length, COPY_CHUNK_SAMPLES):
+                    region[offset:offset + COPY_CHUNK_SAMPLES] = source[offset:offset + COPY_CHUNK_SAMPLES]
+                del source
+            entry = {key: value for key, value in part.items() if key != "path"}
+            entry.update({
+                "start_sample": int(start),
+                "num_samples": int(length),
+                "byte_offset": header_bytes + int(start) * 2,
+                "start_seconds": round(start / sample_rate, 6),
+                "duration_seconds": round(length / sample_rate, 6),
+            })
+            index.append(entry)
+        data.flush()
+        del data
+
+    with open(index_path(session_path), "w", encoding="utf-8") as f:
+        json.dump({"sample_rate": sample_rate, "total_samples": total, "parts": index}, f, indent=2)
+    return index
+
+
+def index_path(session_path):
+    """Path of the sidecar index written next to a session WAV."""
+    return os.path.splitext(session_path)[0] + ".index.json"
+
+
+def main():
+    parts = [wav_part(path) for path in CALIBRATION_WAVS + INSTRUCTION_WAVS]
+    for csv_path in RECORD_CSVS:
+        parts.extend(clips_from_record(csv_path))
+
+    index = assemble_session(parts, SESSION_PATH)
+    duration = (index[-1]["start_seconds"] + index[-1]["duration_seconds"]) if index else 0
+    print(f"Session saved to: {SESSION_PATH} ({len(index)} parts, {duration / 60:.1f} min)")
+    print(f"Index saved to: {index_path(SESSION_PATH)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,171 @@
+import os
+import sys
+import time
+
+import matplotlib
+
+matplotlib.use("Agg")  # Render straight to a file; no window per sheet
+import matplotlib.pyplot as plt
+import numpy as np
+import scipy.fft
+
+import stimulus_store
+import verify_stimuli
+
+# ==========================================
+# ## Parameter Definitions (User Configuration)
+# ==========================================
+
+OUTPUT_DIR = "MPC_Audio"  # Folder of generated stimuli
+SHEET_NAME = "spectrogram_sheet.png"  # Contact sheet, written into the folder
+CACHE_DIR = ".spectrogram_cache"  # Thumbnails cached by file hash, shared across folders
+N_FFT = 2048  # STFT window length (samples)
+HOP = 512  # STFT hop (samples)
+MIN_FREQ_HZ = 100  # Frequency range shown (log scale, so 200 Hz and 5000 Hz are both readable)
+MAX_FREQ_HZ = 8000
+FREQ_ROWS = 64  # Thumbnail height in pixels
+TIME_COLUMNS = 256  # Thumbnail width in pixels
+DYNAMIC_RANGE_DB = 80  # dB below full scale mapped to black
+CLIPS_PER_BATCH = 16  # Clips transformed together (about 100 MB of float32 frames per batch)
+SHEET_COLUMNS = 6  # Thumbnails per row of the sheet
+
+CACHE_VERSION = 1  # Bump when the window, band pooling or dB scaling changes (the STFT sizes are in the name)
+
+
+# ==========================================
+# ## Spectrograms
+# ==========================================
+
+def cache_path(digest, cache_dir=CACHE_DIR):
+    """Thumbnail location of a file hash; the STFT parameters are part of the name."""
+    params = f"v{CACHE_VERSION}-{N_FFT}-{HOP}-{MIN_FREQ_HZ}-{MAX_FREQ_HZ}-{FREQ_ROWS}x{TIME_COLUMNS}"
+    return os.path.join(cache_dir, digest[:2], f"{digest}-{params}.npy")
+
+
+def batch_spectrograms(clips, sample_rate):
+    """
+    Thumbnail spectrograms of equal-length clips in one strided STFT.
+
+    The frames of every clip are a sliding_window_view of the stacked
+    samples (no copy until the window is applied), and all frames of all
+    clips go through a single rfft. Frequency bins are max-pooled into
+    log-spaced bands and time frames down to the thumbnail width.
+
+    Args:
+        clips: int16 array (n_clips, n_samples)
+
+    Returns:
+        float16 array (n_clips, FREQ_ROWS, TIME_COLUMNS) in dBFS, low frequencies in row 0
+    """
+    frames = np.lib.stride_tricks.sliding_window_view(clips, N_FFT, axis=1)[:, ::HOP]
+    window = np.hanning(N_FFT).astype(np.float32)
+    spectrum = scipy.fft.rfft(frames * window, axis=-1, workers=-1)
+
+    band_edges = np.floor(np.geomspace(MIN_FREQ_HZ, MAX_FREQ_HZ, FREQ_ROWS + 1) * N_FFT / sample_rate).astype(int)
+    low, high = band_edges[0], band_edges[-1]
+    power = np.abs(spectrum[:, :, low:high + 1]) ** 2
+    power = np.maximum.reduceat(power, band_edges[:-1] - low, axis=2)  # (n_clips, n_frames, FREQ_ROWS)
+
+    time_edges = np.linspace(0, power.shape[1], TIME_COLUMNS + 1).astype(int)
+    pooled = np.maximum.reduceat(power, time_edges[:-1], axis=1)
+    full_scale = (32768 * window.sum() / 2) ** 2  # Peak bin power of a full-scale sine
+    level = 10 * np.log10(pooled / full_scale + 1e-12)
+    return level.transpose(0, 2, 1).astype(np.float16)
+
+
+def spectrograms(paths, sample_rate, cache_dir=CACHE_DIR, clips_per_batch=CLIPS_PER_BATCH):
+    """
+    Thumbnails of every file, from the cache when the file is unchanged.
+
+    Files missing from the cache are loaded and transformed in batches of
+    equal-length clips; their thumbnails are then cached under the file hash.
+
+    Returns:
+        1. thumbnails: List of (FREQ_ROWS, TIME_COLUMNS) arrays in path order (None for unreadable files)
+        2. computed: Number of files that had to be transformed
+    """
+    digests = [stimulus_store.file_hash(path) for path in paths]
+    thumbnails = [np.load(cache_path(d, cache_dir)) if os.path.exists(cache_path(d, cache_dir)) else None
+                  for d in digests]
+
+    pending = {}  # length -> positions of files to compute
+    loaded = {}
+    for i, thumbnail in enumerate(thumbnails):
+        if thumbnail is None:
+            rate, samples = verify_stimuli.load_samples(paths[i])
+            if rate != sample_rate or samples.dtype != np.int16 or samples.ndim != 1 or len(samples) < N_FFT:
+                print(f"Skipping {os.path.basename(paths[i])}: not 16-bit mono at {sample_rate} Hz")
+                continue
+            loaded[i] = samples
+            pending.setdefault(len(samples), []).append(i)
+
+    for positions in pending.values():
+        for start in range(0, len(positions), clips_per_batch):
+            batch = positions[start:start + clips_per_batch]
+            for i, thumbnail in zip(batch, batch_spectrograms(np.stack([loaded[i] for i in batch]), sample_rate)):
+                path = cache_path(digests[i], cache_dir)
+                os.makedirs(os.path.dirname(path), exist_ok=True)
+                np.save(path, thumbnail)
+                thumbnails[i] = thumbnail
+                del loaded[i]
+    return thumbnails, sum(len(positions) for positions in pending.values())
+
+
+# ==========================================
+# ## Contact Sheet
+# ==========================================
+
+def clip_label(filename):
+    """Label of a thumbnail: the filename, and the answer code on its own line."""
+    match = verify_stimuli.FILENAME_RE.match(filename)
+    return f"{filename}\n{match['code']}" if match else filename
+
+
+def draw_sheet(thumbnails, labels, sheet_path, columns=SHEET_COLUMNS):
+    """
+    Tile thumbnails into one image and save it with a label under each tile.
+
+    All tiles go into a single mosaic array drawn with one imshow, so the
+    cost does not grow with one figure or axes per file.
+    """
+    pad = 4
+    label_height = 28
+    rows = -(-len(thumbnails) // columns)
+    tile_h, tile_w = FREQ_ROWS + label_height, TIME_COLUMNS + pad
+    mosaic = np.full((rows * tile_h, columns * tile_w), np.nan, dtype=np.float32)
+    for i, thumbnail in enumerate(thumbnails):
+        if thumbnail is None:
+            continue
+        row, col = divmod(i, columns)
+        top = row * tile_h
+        mosaic[top:top + FREQ_ROWS, col * tile_w:col * tile_w + TIME_COLUMNS] = thumbnail[::-1]  # High at the top
+
+    dpi = 100
+    fig = plt.figure(figsize=(mosaic.shape[1] / dpi * 1.5, mosaic.shape[0] / dpi * 1.5), dpi=dpi)
+    ax = fig.add_axes([0, 0, 1, 1])
+    ax.imshow(mosaic, cmap="magma", vmin=-DYNAMIC_RANGE_DB, vmax=0, interpolation="nearest", aspect="auto")
+    ax.set_facecolor("white")
+    ax.axis("off")
+    for i, label in enumerate(labels):
+        row, col = divmod(i, columns)
+        ax.text(col * tile_w + TIME_COLUMNS / 2, row * tile_h + FREQ_ROWS + 2, label, ha="center", va="top",
+                fontsize=6, linespacing=1.1)
+    fig.savefig(sheet_path, dpi=dpi)
+    plt.close(fig)
+
+
+def main(folder=OUTPUT_DIR):
+    start = time.perf_counter()
+    filenames = sorted(f for f in os.listdir(folder) if f.lower().endswith((".wav", ".flac")))
+    paths = [os.path.join(folder, f) for f in filenames]
+    thumbnails, computed = spectrograms(paths, verify_stimuli.SAMPLE_RATE)
+
+    sheet_path = os.path.join(folder, SHEET_NAME)
+    draw_sheet(thumbnails, [clip_label(f) for f in filenames], sheet_path)
+    print(f"{len(filenames)} clips ({computed} computed, {len(filenames) - computed} from cache) "
+          f"in {time.perf_counter() - start:.2f}s")
+    print(f"Contact sheet: {sheet_path}")
+
+
+if __name__ == "__main__":
+    main(sys.argv[1] if len(sys.argv) > 1 else OUTPUT_DIR)
@@ -0,0 +1,149 @@
+import csv
+import json
+import struct
+import sys
+
+import numpy as np
+
+# ==========================================
+# ## Parameter Definitions
+# ==========================================
+
+BANK_MAGIC = b"STIMBNK1"
+HEADER_FORMAT = "<8sIQQI"  # magic, sample rate, total samples, index offset (bytes), index length (bytes)
+HEADER_BYTES = 64  # The sample region starts here, so it is aligned for np.memmap
+INDEX_FIELDS = ["Filename", "Group", "Center_Freq(Hz)", "Comp_Freq(Hz)", "Answer_Key(FSFF)", "Offset", "Length"]
+
+
+# ==========================================
+# ## Writing
+# ==========================================
+
+def write_bank(path, rows, clips, sample_rate):
+    """
+    Write clips into one packed bank file.
+
+    Layout: a 64-byte header, then the int16 samples of every clip back to
+    back, then the index table as JSON. Clips are written one at a time as
+    they come from `clips`, so a generator keeps memory at one clip.
+
+    Args:
+        rows: One dict per clip with Filename, Group, Center_Freq(Hz), Comp_Freq(Hz) and Answer_Key(FSFF)
+        clips: Iterable of 1-D int16 arrays, in the same order as rows
+
+    Returns:
+        The index table (rows with Offset and Length in samples)
+    """
+    index = []
+    offset = 0
+    with open(path, "wb") as f:
+        f.write(b"\0" * HEADER_BYTES)
+        for row, clip in zip(rows, clips):
+            clip = np.asarray(clip)
+            if clip.dtype != np.int16 or clip.ndim != 1:
+                raise ValueError(f"{row['Filename']}: bank clips must be 1-D int16 (got {clip.dtype}, {clip.ndim}-D)")
+            f.write(clip.astype("<i2", copy=False).tobytes())
+            entry = {field: row[field] for field in INDEX_FIELDS[:5]}
+            entry.update({"Offset": offset, "Length": len(clip)})
+            index.append(entry)
+            offset += len(clip)
+        if len(index) != len(rows):
+            raise ValueError(f"Got {len(index)} clips for {len(rows)} index rows")
+
+        index_bytes = json.dumps({"sample_rate": sample_rate, "clips": index}).encode("utf-8")
+        index_offset = f.tell()
+        f.write(index_bytes)
+        f.seek(0)
+        f.write(struct.pack(HEADER_FORMAT, BANK_MAGIC, sample_rate, offset, index_offset, len(index_bytes)))
+    return index
+
+
+# ==========================================
+# ## Reading
+# ==========================================
+
+class StimulusBank:
+    """
+    Read-only view of a bank file.
+
+    The sample region is opened with np.memmap, so `clip()` returns a
+    zero-copy slice of the file and only the pages actually read are
+    loaded.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        with open(path, "rb") as f:
+            magic, self.sample_rate, self.total_samples, index_offset, index_length = \
+                struct.unpack(HEADER_FORMAT, f.read(struct.calcsize(HEADER_FORMAT)))
+            if magic != BANK_MAGIC:
+                raise ValueError(f"{path} is not a stimulus bank file")
+            f.seek(index_offset)
+            self.index = json.loads(f.read(index_length).decode("utf-8"))["clips"]
+        self.positions = {entry["Filename"]: i for i, entry in enumerate(self.index)}
+        self.samples = np.memmap(path, dtype="<i2", mode="r", offset=HEADER_BYTES, shape=(self.total_samples,)) \
+            if self.total_samples else np.zeros(0, dtype=np.int16)
+
+    def __len__(self):
+        return len(self.index)
+
+    def __iter__(self):
+        """Yield (index entry, samples) for every clip, in bank order."""
+        for entry in self.index:
+            yield entry, self.samples[entry["Offset"]:entry["Offset"] + entry["Length"]]
+
+    def __contains__(self, filename):
+        return filename in self.positions
+
+    def entry(self, key):
+        """Index entry of a clip, by position or filename."""
+        return self.index[self.positions[key] if isinstance(key, str) else key]
+
+    def clip(self, key):
+        """Samples of a clip (by position or filename) as a zero-copy int16 view."""
+        entry = self.entry(key)
+        return self.samples[entry["Offset"]:entry["Offset"] + entry["Length"]]
+
+    def records(self):
+        """Answer-key rows in the layout of the make_audio_record CSV (plus the group), in bank order."""
+        return [[entry["Group"], entry["Filename"], entry["Center_Freq(Hz)"], entry["Comp_Freq(Hz)"],
+                 entry["Answer_Key(FSFF)"]] for entry in self.index]
+
+    def answer_keys(self):
+        """Answer keys in bank order, in the format used by judge.py: {'p': pattern, 'f': comparison, 'c': center}."""
+        return [{'p': entry["Answer_Key(FSFF)"], 'f': entry["Comp_Freq(Hz)"], 'c': entry["Center_Freq(Hz)"]}
+                for entry in self.index]
+
+    def close(self):
+        """Drop the memory map; it is unmapped once no clip views are left."""
+        self.samples = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def export_record(bank_path, csv_path):
+    """Write the answer-key record CSV of a bank, for tools that still read the CSV."""
+    with StimulusBank(bank_path) as bank:
+        rows = bank.records()
+    with open(csv_path, mode='w', newline='', encoding='utf-8') as f:
+        writer = csv.writer(f)
+        writer.writerow(["Group", "Filename", "Center_Freq(Hz)", "Comp_Freq(Hz)", "Answer_Key(FSFF)"])
+        writer.writerows(rows)
+    return csv_path
+
+
+def main(bank_path):
+    with StimulusBank(bank_path) as bank:
+        seconds = bank.total_samples / bank.sample_rate
+        print(f"{bank_path}: {len(bank)} clips, {seconds:.1f}s at {bank.sample_rate} Hz")
+        for entry in bank.index:
+            print(f"{entry['Filename']} | {entry['Center_Freq(Hz)']} vs {entry['Comp_Freq(Hz)']} Hz "
+                  f"| {entry['Answer_Key(FSFF)']} | offset {entry['Offset']}, {entry['Length']} samples")
+
+
+if __name__ == "__main__":
+    main(sys.argv[1])
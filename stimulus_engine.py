@@ -0,0 +1,435 @@
+from collections import OrderedDict
+
+import numpy as np
+
+# ==========================================
+# ## Clip Layout Parameters
+# ==========================================
+# Each comparison pair is laid out as:
+#   200ms blank | 500ms tone 1 | 200ms blank | 500ms tone 2 | 4 x 200ms blank
+# and each clip holds PAIRS_PER_CLIP pairs back to back.
+
+SAMPLE_RATE = 44100  # Default sampling rate
+BLANK_SECONDS = 0.2  # Blank/interval duration
+TONE_SECONDS = 0.5  # Tone duration
+TRAILING_BLANKS = 4  # Number of blanks after the second tone of each pair
+PAIRS_PER_CLIP = 4  # Number of comparison pairs in one clip
+TONE_CACHE_BYTES = 64 * 1024 * 1024  # Size limit of the shared tone cache
+HARMONIC_BASIS_BYTES = 128 * 1024 * 1024  # Size limit of the shared harmonic basis cache
+
+# Synthesis methods:
+#   "direct"     - float64 phase and np.sin per sample (reference, matches the original generators)
+#   "recurrence" - complex64 rotator, float32 end to end, renormalized every RENORM_BLOCK samples
+SYNTHESIS_METHODS = ("direct", "recurrence")
+RENORM_BLOCK = 1024  # Samples between rotator renormalizations
+
+
+# ==========================================
+# ## Caching
+# ==========================================
+
+class LRUCache:
+    """
+    Size-bounded mapping that evicts the least recently used entries.
+
+    Args:
+        max_size: Total size allowed before eviction
+        sizeof: Function giving the size of a value (defaults to 1 per entry)
+    """
+
+    def __init__(self, max_size, sizeof=None):
+        self.max_size = max_size
+        self.sizeof = sizeof or (lambda value: 1)
+        self.size = 0
+        self.hits = 0
+        self.misses = 0
+        self._items = OrderedDict()
+
+    def __len__(self):
+        return len(self._items)
+
+    def __contains__(self, key):
+        return key in self._items
+
+    def get(self, key, default=None):
+        """Return the cached value (marking it as recently used) and count the hit or miss."""
+        if key in self._items:
+            self._items.move_to_end(key)
+            self.hits += 1
+            return self._items[key]
+        self.misses += 1
+        return default
+
+    def put(self, key, value):
+        """Insert a value, evicting old entries until the cache fits its size limit."""
+        if key in self._items:
+            self.size -= self.sizeof(self._items.pop(key))
+        self._items[key] = value
+        self.size += self.sizeof(value)
+        while self.size > self.max_size and len(self._items) > 1:
+            _, evicted = self._items.popitem(last=False)
+            self.size -= self.sizeof(evicted)
+
+    def clear(self):
+        self._items.clear()
+        self.size = 0
+        self.hits = 0
+        self.misses = 0
+
+    def stats(self):
+        """Return hit/miss counters and current occupancy."""
+        total = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / total if total else 0.0,
+            "entries": len(self._items),
+            "size": self.size,
+            "max_size": self.max_size,
+        }
+
+
+class ToneCache(LRUCache):
+    """
+    LRU cache of synthesized tones keyed by (frequency, duration, sample rate, dtype).
+
+    Cached tones are stored read-only and handed out as views, so every
+    distinct tone is computed once and shared by all clips that use it.
+    """
+
+    def __init__(self, max_bytes=TONE_CACHE_BYTES):
+        super().__init__(max_bytes, sizeof=lambda tone: tone.nbytes)
+
+    @staticmethod
+    def key(frequency, n_samples, sample_rate, dtype, method="direct"):
+        return float(frequency), int(n_samples), int(sample_rate), np.dtype(dtype).str, method
+
+    def tones(self, frequencies, n_samples, sample_rate=SAMPLE_RATE, dtype=np.float32, method="direct"):
+        """
+        Return one read-only tone per frequency, synthesizing all misses in one batch.
+
+        Returns:
+            List of arrays of shape (n_samples,)
+        """
+        keys = [self.key(f, n_samples, sample_rate, dtype, method) for f in frequencies]
+        found = [self.get(k) for k in keys]
+        missing = {keys[i]: frequencies[i] for i, tone in enumerate(found) if tone is None}
+        if missing:
+            table = tone_table(list(missing.values()), n_samples, sample_rate, dtype, method)
+            synthesized = {}
+            for row, k in zip(table, missing):
+                tone = row.copy()
+                tone.setflags(write=False)
+                self.put(k, tone)
+                synthesized[k] = tone
+            found = [synthesized[k] if tone is None else tone for k, tone in zip(keys, found)]
+        return [tone.view() for tone in found]
+
+
+TONE_CACHE = ToneCache()  # Shared cache used by the generators
+
+
+class HarmonicBasisCache(LRUCache):
+    """
+    LRU cache of harmonic bases keyed by (fundamental, harmonics, duration, sample rate, dtype).
+
+    A basis is the (2 * n_harmonics, n_samples) matrix of sin and cos rows
+    of every harmonic (see `harmonic_basis`); any amplitude/phase recipe
+    on the same fundamental is then one matrix-vector product.
+    """
+
+    def __init__(self, max_bytes=HARMONIC_BASIS_BYTES):
+        super().__init__(max_bytes, sizeof=lambda basis: basis.nbytes)
+
+    @staticmethod
+    def key(frequency, n_harmonics, n_samples, sample_rate, dtype):
+        return float(frequency), int(n_harmonics), int(n_samples), int(sample_rate), np.dtype(dtype).str
+
+    def bases(self, frequencies, n_harmonics, n_samples, sample_rate=SAMPLE_RATE, dtype=np.float32):
+        """Return one read-only basis per fundamental, building all misses in one batch."""
+        keys = [self.key(f, n_harmonics, n_samples, sample_rate, dtype) for f in frequencies]
+        found = [self.get(k) for k in keys]
+        missing = {keys[i]: frequencies[i] for i, basis in enumerate(found) if basis is None}
+        if missing:
+            table = harmonic_basis(list(missing.values()), n_harmonics, n_samples, sample_rate, dtype)
+            synthesized = {}
+            for basis, k in zip(table, missing):
+                basis.setflags(write=False)
+                self.put(k, basis)
+                synthesized[k] = basis
+            found = [synthesized[k] if basis is None else basis for k, basis in zip(keys, found)]
+        return found
+
+
+HARMONIC_BASIS_CACHE = HarmonicBasisCache()  # Shared cache of harmonic bases
+
+
+# ==========================================
+# ## Core Logic
+# ==========================================
+
+def pair_layout(sample_rate=SAMPLE_RATE):
+    """Return (blank, tone, pair) lengths in samples for one comparison pair."""
+    blank = int(BLANK_SECONDS * sample_rate)
+    tone = int(TONE_SECONDS * sample_rate)
+    pair = blank + tone + blank + tone + TRAILING_BLANKS * blank
+    return blank, tone, pair
+
+
+def tone_offsets(sample_rate=SAMPLE_RATE):
+    """Return the sample offsets of the first and second tone inside a pair."""
+    blank, tone, _ = pair_layout(sample_rate)
+    return blank, 2 * blank + tone
+
+
+def tone_table(frequencies, n_samples, sample_rate=SAMPLE_RATE, dtype=np.float32, method="direct"):
+    """
+    Synthesize one sine tone per frequency in a single broadcasted pass.
+
+    With the "direct" method the phase is always computed in float64 so the
+    result matches the original per-tone `generate_sine_wave` before the
+    final cast. The "recurrence" method uses `recurrence_tone_table`.
+
+    Returns:
+        Array of shape (len(frequencies), n_samples)
+    """
+    if method == "recurrence":
+        return recurrence_tone_table(frequencies, n_samples, sample_rate).astype(dtype, copy=False)
+    if method != "direct":
+        raise ValueError(f"Unknown synthesis method {method!r}; expected one of {SYNTHESIS_METHODS}")
+    t = np.linspace(0, n_samples / sample_rate, n_samples, endpoint=False)
+    phase = (2 * np.pi * np.asarray(frequencies, dtype=np.float64))[:, None] * t
+    return np.sin(phase, out=phase).astype(dtype, copy=False)
+
+
+def recurrence_tone_table(frequencies, n_samples, sample_rate=SAMPLE_RATE, block=RENORM_BLOCK):
+    """
+    Synthesize sine tones in float32 with a complex rotator instead of np.sin.
+
+    Each tone is z[n] = exp(i * omega * n), split into blocks of `block`
+    samples: z[j * block + k] = start[j] * inner[k]. `inner` is filled by
+    doubling (inner[m:2m] = inner[:m] * w^m) and the block starts follow the
+    recurrence start[j + 1] = start[j] * w^block, renormalized to unit length
+    every block. The rotators and block starts (one value per block) are
+    kept in double precision and rounded once, so the phase stays accurate
+    over long tones and sub-Hz steps while all per-sample work is done in
+    complex64/float32.
+
+    Returns:
+        float32 array of shape (len(frequencies), n_samples)
+    """
+    omega = 2 * np.pi * np.asarray(frequencies, dtype=np.float64) / sample_rate
+    n_blocks = -(-n_samples // block)
+
+    # Rotation inside one block, by doubling: inner[k] = w^k for k < block
+    rotator = np.exp(1j * omega)  # w; with w^block below, the only transcendental calls per frequency
+    inner = np.empty((len(omega), block), dtype=np.complex64)
+    inner[:, 0] = 1
+    filled = 1
+    while filled < block:
+        step = min(filled, block - filled)
+        inner[:, filled:filled + step] = inner[:, :step] * rotator[:, None].astype(np.complex64)
+        rotator = rotator * rotator  # w^(2 * filled), in float64
+        filled += step
+    block_rotator = np.exp(1j * omega * block)  # w^block
+
+    # Block starts by recurrence, renormalized every block; only one value per
+    # block is needed, so this runs in complex128 and is rounded once
+    starts = np.empty((len(omega), n_blocks), dtype=np.complex128)
+    current = np.ones(len(omega), dtype=np.complex128)
+    for j in range(n_blocks):
+        starts[:, j] = current
+        current = current * block_rotator
+        current /= np.abs(current)
+    starts = starts.astype(np.complex64)
+
+    # Imaginary part of starts x inner, without a full complex temporary
+    tones = np.empty((len(omega), n_blocks, block), dtype=np.float32)
+    np.multiply(starts.real[:, :, None], inner.imag[:, None, :], out=tones)
+    tones += starts.imag[:, :, None] * inner.real[:, None, :]
+    return tones.reshape(len(omega), n_blocks * block)[:, :n_samples]
+
+
+def harmonic_spec(amplitudes, phases=None):
+    """
+    Describe a harmonic complex tone.
+
+    Args:
+        amplitudes: Relative amplitude of harmonics 1..N (1 is the fundamental)
+        phases: Starting phase of each harmonic in radians (defaults to sine phase, all 0)
+
+    Returns:
+        Hashable (amplitudes, phases) tuple accepted by `render_clips(harmonics=...)`
+    """
+    amplitudes = tuple(float(a) for a in amplitudes)
+    phases = tuple(float(p) for p in phases) if phases is not None else (0.0,) * len(amplitudes)
+    if not amplitudes or len(phases) != len(amplitudes):
+        raise ValueError("Need one phase per harmonic amplitude and at least one harmonic")
+    if not any(amplitudes):
+        raise ValueError("At least one harmonic amplitude must be non-zero")
+    return amplitudes, phases
+
+
+def harmonic_basis(frequencies, n_harmonics, n_samples, sample_rate=SAMPLE_RATE, dtype=np.float32):
+    """
+    Build the sin/cos basis of harmonics 1..n_harmonics of each fundamental.
+
+    Rows 0..N-1 hold sin(2 pi h f t) and rows N..2N-1 cos(2 pi h f t). Only
+    the fundamental goes through np.sin/np.cos (float64 phase, like the
+    "direct" method); higher harmonics follow from the Chebyshev recurrence
+    x_(h+1) = 2 cos(w t) x_h - x_(h-1) in float64. Harmonics at or above
+    Nyquist are left as zero rows so they cannot alias.
+
+    Returns:
+        Array of shape (len(frequencies), 2 * n_harmonics, n_samples)
+    """
+    frequencies = np.asarray(frequencies, dtype=np.float64)
+    t = np.linspace(0, n_samples / sample_rate, n_samples, endpoint=False)
+    phase = (2 * np.pi * frequencies)[:, None] * t
+    basis = np.zeros((len(frequencies), 2 * n_harmonics, n_samples), dtype=dtype)
+
+    two_cos = 2 * np.cos(phase)
+    sin_prev, sin_h = np.zeros_like(phase), np.sin(phase)
+    cos_prev, cos_h = np.ones_like(phase), two_cos / 2
+    for h in range(n_harmonics):
+        below_nyquist = (h + 1) * frequencies < sample_rate / 2
+        basis[below_nyquist, h] = sin_h[below_nyquist]
+        basis[below_nyquist, n_harmonics + h] = cos_h[below_nyquist]
+        sin_prev, sin_h = sin_h, two_cos * sin_h - sin_prev
+        cos_prev, cos_h = cos_h, two_cos * cos_h - cos_prev
+    return basis
+
+
+def complex_tone_table(frequencies, n_samples, sample_rate=SAMPLE_RATE, harmonics=None, dtype=np.float32,
+                       cache=HARMONIC_BASIS_CACHE):
+    """
+    Synthesize one harmonic complex tone per fundamental as coefficients x basis.
+
+    sum_h a_h sin(2 pi h f t + phi_h) is written as the coefficient vector
+    [a_h cos(phi_h), a_h sin(phi_h)] times the cached sin/cos basis of f, so
+    each tone is a single matrix-vector product instead of a loop over
+    harmonics. The coefficients are divided by sum(|a_h|), so the peak can
+    never exceed 1 and a single harmonic gives the same level as a pure tone.
+
+    Args:
+        harmonics: (amplitudes, phases) from `harmonic_spec`
+
+    Returns:
+        Array of shape (len(frequencies), n_samples)
+    """
+    amplitudes, phases = harmonic_spec(*harmonics)
+    amplitudes, phases = np.array(amplitudes), np.array(phases)
+    coefficients = np.concatenate([amplitudes * np.cos(phases), amplitudes * np.sin(phases)])
+    coefficients = (coefficients / np.abs(amplitudes).sum()).astype(dtype)
+
+    if cache is None:
+        bases = harmonic_basis(frequencies, len(amplitudes), n_samples, sample_rate, dtype)
+    else:
+        bases = cache.bases(frequencies, len(amplitudes), n_samples, sample_rate, dtype)
+    table = np.empty((len(bases), n_samples), dtype=dtype)
+    for row, basis in zip(table, bases):
+        np.matmul(coefficients, basis, out=row)
+    return table
+
+
+def quantize_pcm16(tones):
+    """Scale [-1, 1] tones to 16-bit PCM, truncating exactly like np.int16(x * 32767) on float64."""
+    return np.multiply(tones, 32767, dtype=np.float64).astype(np.int16)
+
+
+def clip_timeline(n_clips, n_pairs=PAIRS_PER_CLIP, sample_rate=SAMPLE_RATE, dtype=np.int16):
+    """Preallocate the silent (n_clips, n_pairs, pair) buffer that tones are written into."""
+    _, _, pair = pair_layout(sample_rate)
+    return np.zeros((n_clips, n_pairs, pair), dtype=dtype)
+
+
+def codes_to_tone_freqs(center_freq, comp_freqs, codes):
+    """
+    Turn F/S answer codes into the frequency played at each tone position.
+
+    Args:
+        center_freq: Center frequency, a scalar or one value per clip
+        comp_freqs: Comparison frequency of each clip, shape (n_clips,)
+        codes: Boolean array (n_clips, n_pairs); True means F (center first)
+
+    Returns:
+        Array of shape (n_clips, n_pairs, 2) with the (first, second) frequency
+    """
+    codes = np.asarray(codes, dtype=bool)
+    center = np.asarray(center_freq, dtype=np.float64).reshape(-1, 1)
+    comp = np.asarray(comp_freqs, dtype=np.float64).reshape(-1, 1)
+    first = np.where(codes, center, comp)
+    second = np.where(codes, comp, center)
+    return np.stack([first, second], axis=-1)
+
+
+def render_tone_matrix(tone_freqs, sample_rate=SAMPLE_RATE, dtype=np.float32, tone_dtype=None, cache=TONE_CACHE,
+                       method="direct", harmonics=None):
+    """
+    Render every clip described by a (n_clips, n_pairs, 2) frequency matrix.
+
+    Each distinct frequency is synthesized once, then scattered into the
+    tone slots of a preallocated (n_clips, n_pairs, pair) buffer, so the
+    whole set is built without per-pair concatenation.
+
+    `tone_dtype` is the precision the tones are synthesized in before being
+    placed in the `dtype` buffer (defaults to `dtype`, or float32 for an
+    int16 buffer). For int16 output only the distinct tones are quantized,
+    and the final PCM buffer is the only full-size allocation. Tones are
+    taken from `cache` when given; pass None to always synthesize.
+    `method` selects the synthesis method (see SYNTHESIS_METHODS).
+    With `harmonics` (see `harmonic_spec`) every tone is a harmonic complex
+    on that fundamental instead of a pure tone; `method` is then unused.
+
+    Returns:
+        Array of shape (n_clips, n_samples)
+    """
+    tone_freqs = np.asarray(tone_freqs, dtype=np.float64)
+    n_clips, n_pairs, _ = tone_freqs.shape
+    _, tone, pair = pair_layout(sample_rate)
+    first, second = tone_offsets(sample_rate)
+
+    is_pcm16 = np.dtype(dtype) == np.int16
+    if tone_dtype is None:
+        tone_dtype = np.float32 if is_pcm16 else dtype
+
+    unique, index = np.unique(tone_freqs, return_inverse=True)
+    index = index.reshape(tone_freqs.shape)
+    if harmonics is not None:
+        basis_cache = None if cache is None else HARMONIC_BASIS_CACHE
+        table = complex_tone_table(unique, tone, sample_rate, harmonics, tone_dtype, basis_cache)
+    elif cache is None:
+        table = tone_table(unique, tone, sample_rate, tone_dtype, method)
+    else:
+        table = np.stack(cache.tones(unique, tone, sample_rate, tone_dtype, method))
+    if is_pcm16:
+        table = quantize_pcm16(table)
+
+    clips = clip_timeline(n_clips, n_pairs, sample_rate, dtype)
+    clips[:, :, first:first + tone] = table[index[:, :, 0]]
+    clips[:, :, second:second + tone] = table[index[:, :, 1]]
+    return clips.reshape(n_clips, n_pairs * pair)
+
+
+def render_clips(center_freq, comp_freqs, codes, sample_rate=SAMPLE_RATE, dtype=np.float32, tone_dtype=None,
+                 cache=TONE_CACHE, method="direct", harmonics=None):
+    """
+    Render one clip per comparison frequency from its F/S answer codes.
+
+    Args:
+        center_freq: Center frequency (High pitch), scalar or per clip
+        comp_freqs: Comparison frequencies (Low pitch), shape (n_clips,)
+        codes: Boolean array (n_clips, n_pairs); True means F (center first)
+        harmonics: Optional (amplitudes, phases) for complex tones (see harmonic_spec)
+
+    Returns:
+        Array of shape (n_clips, n_samples)
+    """
+    tone_freqs = codes_to_tone_freqs(center_freq, comp_freqs, codes)
+    return render_tone_matrix(tone_freqs, sample_rate, dtype, tone_dtype, cache, method, harmonics)
+
+
+def code_strings(codes):
+    """Convert a boolean code matrix into answer strings such as "FSFF"."""
+    letters = np.where(np.asarray(codes, dtype=bool), "F", "S")
+    return ["".join(row) for row in letters]
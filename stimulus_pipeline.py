@@ -0,0 +1,141 @@
+import queue
+import threading
+import time
+
+# ==========================================
+# ## Parameter Definitions
+# ==========================================
+
+QUEUE_SIZE = 8  # Rendered clips waiting to be written; bounds memory to about QUEUE_SIZE clips
+NUM_WRITERS = 4  # Writer threads draining the queue
+
+
+# ==========================================
+# ## Stage Counters
+# ==========================================
+
+class StageCounter:
+    """
+    Throughput counter of one pipeline stage.
+
+    `busy` is the time spent doing the stage's own work and `blocked` the
+    time spent waiting on the queue: a producer blocked on a full queue
+    means writes are the bottleneck, writers blocked on an empty queue mean
+    synthesis is.
+    """
+
+    def __init__(self, name):
+        self.name = name
+        self.items = 0
+        self.bytes = 0
+        self.busy = 0.0
+        self.blocked = 0.0
+        self.lock = threading.Lock()
+
+    def add(self, items=0, nbytes=0, busy=0.0, blocked=0.0):
+        with self.lock:
+            self.items += items
+            self.bytes += nbytes
+            self.busy += busy
+            self.blocked += blocked
+
+    def stats(self, workers=1):
+        """Summary dict; rates are per worker-second of busy time scaled by the number of workers."""
+        busy = self.busy / workers
+        return {
+            "stage": self.name,
+            "items": self.items,
+            "MB": round(self.bytes / 1e6, 2),
+            "busy_s": round(busy, 4),
+            "blocked_s": round(self.blocked / workers, 4),
+            "clips_per_s": round(self.items / busy, 1) if busy else None,
+            "MB_per_s": round(self.bytes / 1e6 / busy, 1) if busy else None,
+        }
+
+
+# ==========================================
+# ## Pipeline
+# ==========================================
+
+def run_pipeline(jobs, render, write, queue_size=QUEUE_SIZE, num_writers=NUM_WRITERS):
+    """
+    Render jobs on the calling thread and write them from a pool of writer threads.
+
+    render(job) returns the audio of one job and write(job, audio) stores it
+    and returns the number of bytes written. The queue between the two is
+    bounded, so rendering blocks once `queue_size` clips are waiting and at
+    most queue_size + num_writers clips are held in memory. The first writer
+    error stops rendering and is raised once the writers have finished.
+
+    Returns:
+        Dict with the "synthesis" and "write" stage stats and the wall time
+    """
+    pending = queue.Queue(maxsize=queue_size)
+    synthesis = StageCounter("synthesis")
+    writes = StageCounter("write")
+    errors = []
+    done = object()
+
+    def writer():
+        while True:
+            start = time.perf_counter()
+            item = pending.get()
+            writes.add(blocked=time.perf_counter() - start)
+            if item is done:
+                return
+            if errors:
+                continue  # Drain the queue so the producer is not left blocked
+            job, audio = item
+            start = time.perf_counter()
+            try:
+                nbytes = write(job, audio)
+            except Exception as exc:
+                errors.append(exc)
+                continue
+            writes.add(items=1, nbytes=nbytes, busy=time.perf_counter() - start)
+
+    wall_start = time.perf_counter()
+    threads = [threading.Thread(target=writer, daemon=True) for _ in range(num_writers)]
+    for thread in threads:
+        thread.start()
+
+    try:
+        for job in jobs:
+            if errors:
+                break
+            start = time.perf_counter()
+            audio = render(job)
+            rendered = time.perf_counter()
+            pending.put((job, audio))
+            synthesis.add(items=1, nbytes=audio.nbytes, busy=rendered - start, blocked=time.perf_counter() - rendered)
+    finally:
+        for _ in threads:
+            pending.put(done)
+        for thread in threads:
+            thread.join()
+
+    if errors:
+        raise errors[0]
+    return {
+        "synthesis": synthesis.stats(),
+        "write": writes.stats(num_writers),
+        "wall_s": round(time.perf_counter() - wall_start, 4),
+    }
+
+
+def bottleneck(stats):
+    """Name the stage that limited a pipeline run, from the blocked times of run_pipeline stats."""
+    if stats["synthesis"]["blocked_s"] > stats["write"]["blocked_s"]:
+        return "write"
+    return "synthesis"
+
+
+def format_stats(stats):
+    """One line per stage plus the bottleneck, for printing."""
+    lines = []
+    for stage in ("synthesis", "write"):
+        s = stats[stage]
+        lines.append(f"{s['stage']:<10} {s['items']} clips, {s['MB']} MB, busy {s['busy_s']:.3f}s, "
+                     f"blocked {s['blocked_s']:.3f}s ({s['clips_per_s']} clips/s, {s['MB_per_s']} MB/s)")
+    lines.append(f"Wall time {stats['wall_s']:.3f}s; bottleneck: {bottleneck(stats)}")
+    return "\n".join(lines)
@@ -0,0 +1,223 @@
+import io
+import json
+import re
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+import numpy as np
+from scipy.io.wavfile import write
+
+import stimulus_engine
+
+# ==========================================
+# ## Parameter Definitions (User Configuration)
+# ==========================================
+
+HOST = "127.0.0.1"  # Address to listen on
+PORT = 8000  # Port to listen on
+SAMPLE_RATE = 44100  # Sampling rate
+CACHE_BYTES = 256 * 1024 * 1024  # Size limit of the encoded WAV cache
+
+# Request format: /stimulus?center=5000&comp=4982&code=SFSS
+CODE_PATTERN = re.compile(rf"^[FS]{{{stimulus_engine.PAIRS_PER_CLIP}}}$")
+RANGE_PATTERN = re.compile(r"^bytes=(\d*)-(\d*)$")
+
+
+# ==========================================
+# ## Core Logic
+# ==========================================
+
+class LockedToneCache(stimulus_engine.ToneCache):
+    """Tone cache safe to share between request threads (each lookup and insert is atomic)."""
+
+    def __init__(self, max_bytes=stimulus_engine.TONE_CACHE_BYTES):
+        super().__init__(max_bytes)
+        self._lock = threading.Lock()
+
+    def get(self, key, default=None):
+        with self._lock:
+            return super().get(key, default)
+
+    def put(self, key, value):
+        with self._lock:
+            super().put(key, value)
+
+    def stats(self):
+        with self._lock:
+            return super().stats()
+
+
+class StimulusRenderer:
+    """Render and cache encoded WAV bytes for (center, comparison, answer code) requests."""
+
+    def __init__(self, cache_bytes=CACHE_BYTES, sample_rate=SAMPLE_RATE):
+        self.sample_rate = sample_rate
+        self.cache = stimulus_engine.LRUCache(cache_bytes, sizeof=len)
+        self.tone_cache = LockedToneCache()
+        self._lock = threading.Lock()
+        self._in_flight = {}  # key -> Event set when the thread rendering that key is done
+
+    def render(self, center_freq, comp_freq, code_str):
+        """Return the WAV bytes of one clip, laid out exactly like `create_audio_for_pair`."""
+        codes = np.array([[c == "F" for c in code_str]])
+        audio = stimulus_engine.render_clips(center_freq, [comp_freq], codes, self.sample_rate,
+                                             dtype=np.int16, tone_dtype=np.float32, cache=self.tone_cache)[0]
+        buffer = io.BytesIO()
+        write(buffer, self.sample_rate, audio)
+        return buffer.getvalue()
+
+    def get(self, center_freq, comp_freq, code_str):
+        """
+        Return the WAV bytes of a clip, rendering it on a cache miss.
+
+        The lock only guards the cache lookups and inserts, so misses on
+        different keys render concurrently; a request for a key that is
+        already being rendered waits for that render instead of repeating it.
+        """
+        key = (float(center_freq), float(comp_freq), code_str)
+        while True:
+            with self._lock:
+                data = self.cache.get(key)
+                if data is not None:
+                    return data
+                event = self._in_flight.get(key)
+                if event is None:
+                    event = self._in_flight[key] = threading.Event()
+                    break
+            event.wait()  # Then look again: the render may have failed or been evicted already
+
+        try:
+            data = self.render(center_freq, comp_freq, code_str)
+            with self._lock:
+                self.cache.put(key, data)
+        finally:
+            with self._lock:
+                del self._in_flight[key]
+            event.set()
+        return data
+
+    def stats(self):
+        with self._lock:
+            responses = self.cache.stats()
+        return {"responses": responses, "tones": self.tone_cache.stats()}
+
+
+def validate_freq(value, sample_rate=SAMPLE_RATE):
+    """Return an error message if a frequency cannot be rendered, else None."""
+    if not np.isfinite(value) or value <= 0:
+        return "must be a positive finite number"
+    if value >= sample_rate / 2:
+        return f"must be below the Nyquist frequency ({sample_rate / 2:g} Hz)"
+    return None
+
+
+def parse_range(header, size):
+    """
+    Parse a single "bytes=start-end" Range header.
+
+    Returns:
+        (start, end) inclusive; "full" for a header the server ignores (multiple
+        ranges or another unit, answered with the whole body as RFC 7233 allows);
+        None if the range cannot be satisfied
+    """
+    header = header.strip()
+    if "," in header or not header.startswith("bytes="):
+        return "full"
+    match = RANGE_PATTERN.match(header)
+    if not match or match.groups() == ("", ""):
+        return None
+    first, last = match.groups()
+    if first == "":  # Suffix range: the last N bytes
+        start, end = max(size - int(last), 0), size - 1
+    else:
+        start = int(first)
+        end = min(int(last), size - 1) if last else size - 1
+    if start >= size or start > end:
+        return None
+    return start, end
+
+
+class StimulusHandler(BaseHTTPRequestHandler):
+    renderer = None  # Set by make_server
+
+    def do_GET(self):
+        self.respond(send_body=True)
+
+    def do_HEAD(self):
+        self.respond(send_body=False)
+
+    def respond(self, send_body):
+        url = urlparse(self.path)
+        if url.path == "/stats":
+            self.send_bytes(json.dumps(self.renderer.stats()).encode(), "application/json", send_body)
+            return
+        if url.path != "/stimulus":
+            self.send_error(404, "Use /stimulus?center=...&comp=...&code=... or /stats")
+            return
+
+        query = parse_qs(url.query)
+        try:
+            center_freq = float(query["center"][0])
+            comp_freq = float(query["comp"][0])
+            code_str = query["code"][0].upper()
+        except (KeyError, ValueError):
+            self.send_error(400, "center, comp and code are required; center and comp must be numbers")
+            return
+        for name, value in (("center", center_freq), ("comp", comp_freq)):
+            problem = validate_freq(value, self.renderer.sample_rate)
+            if problem:
+                self.send_error(400, f"{name} {problem}")
+                return
+        if not CODE_PATTERN.match(code_str):
+            self.send_error(400, f"code must be {stimulus_engine.PAIRS_PER_CLIP} letters of F/S")
+            return
+
+        data = self.renderer.get(center_freq, comp_freq, code_str)
+        self.send_bytes(data, "audio/wav", send_body, self.headers.get("Range"))
+
+    def send_bytes(self, data, content_type, send_body, range_header=None):
+        status, body = 200, data
+        byte_range = parse_range(range_header, len(data)) if range_header else "full"
+        if byte_range != "full":
+            if byte_range is None:
+                self.send_response(416)
+                self.send_header("Content-Range", f"bytes */{len(data)}")
+                self.send_header("Content-Length", "0")
+                self.end_headers()
+                return
+            start, end = byte_range
+            status, body = 206, memoryview(data)[start:end + 1]
+
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        self.send_header("Accept-Ranges", "bytes")
+        if status == 206:
+            self.send_header("Content-Range", f"bytes {start}-{end}/{len(data)}")
+        self.end_headers()
+        if send_body:
+            self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass  # Keep the console quiet under load
+
+
+class StimulusServer(ThreadingHTTPServer):
+    daemon_threads = True
+    request_queue_size = 128  # The default backlog of 5 stalls concurrent clients on reconnects
+
+
+def make_server(host=HOST, port=PORT, cache_bytes=CACHE_BYTES):
+    """Create a threaded stimulus server with its own response cache."""
+    handler = type("Handler", (StimulusHandler,), {"renderer": StimulusRenderer(cache_bytes)})
+    return StimulusServer((host, port), handler)
+
+
+if __name__ == "__main__":
+    server = make_server()
+    print(f"Serving stimuli on http://{HOST}:{PORT}/stimulus?center=5000&comp=4982&code=SFSS")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        server.server_close()
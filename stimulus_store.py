@@ -0,0 +1,124 @@
+import hashlib
+import json
+import os
+import shutil
+
+import numpy as np
+import audio_export
+import stimulus_engine
+
+# ==========================================
+# ## Parameter Definitions
+# ==========================================
+
+STORE_DIR = ".stimulus_store"  # Default store location
+STORE_VERSION = 1  # Bump when synthesis or sample quantization changes: keys hash only the clip parameters
+
+
+# ==========================================
+# ## Core Logic
+# ==========================================
+
+def stimulus_key(tone_freqs, sample_rate, tone_dtype, dtype=np.int16, method="direct", audio_format="wav",
+                 harmonics=None):
+    """
+    Hash every parameter that determines the samples of one clip.
+
+    Args:
+        tone_freqs: (n_pairs, 2) frequencies in playing order, which encodes
+            both the frequencies and the F/S order code
+        sample_rate: Sampling rate
+        tone_dtype: Precision the tones are synthesized in
+        dtype: Sample format of the stored file
+        method: Synthesis method (see stimulus_engine.SYNTHESIS_METHODS)
+        audio_format: File format of the stored file ("wav" or "flac")
+        harmonics: (amplitudes, phases) of complex tones, or None for pure tones
+    """
+    params = {
+        "version": STORE_VERSION,
+        "sample_rate": int(sample_rate),
+        "blank_seconds": stimulus_engine.BLANK_SECONDS,
+        "tone_seconds": stimulus_engine.TONE_SECONDS,
+        "trailing_blanks": stimulus_engine.TRAILING_BLANKS,
+        "tone_freqs": np.asarray(tone_freqs, dtype=np.float64).tolist(),
+        "tone_dtype": np.dtype(tone_dtype).name,
+        "dtype": np.dtype(dtype).name,
+        "method": method,
+        "audio_format": audio_format,
+    }
+    if harmonics is not None:
+        params["harmonics"] = [list(values) for values in stimulus_engine.harmonic_spec(*harmonics)]
+    return hashlib.sha256(json.dumps(params, sort_keys=True).encode()).hexdigest()
+
+
+def file_hash(path, chunk_size=1 << 20):
+    """sha256 of a file's bytes."""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def release(path):
+    """Remove path if it is hard-linked (e.g. into a store), so rewriting it cannot alter the other copy."""
+    if os.path.exists(path) and os.stat(path).st_nlink > 1:
+        os.remove(path)
+
+
+class StimulusStore:
+    """
+    Content-addressed stimulus store shared by every generator run.
+
+    Each clip is stored once under the hash of its synthesis parameters and
+    hard-linked (or copied, across file systems) into output folders, so
+    unchanged conditions are neither re-synthesized nor rewritten.
+    """
+
+    def __init__(self, root=STORE_DIR):
+        self.root = root
+
+    def path(self, key, audio_format="wav"):
+        return os.path.join(self.root, key[:2], f"{key}.{audio_format}")
+
+    def materialize(self, tone_freqs, dest_paths, sample_rate, tone_dtype, method="direct", audio_format="wav",
+                    harmonics=None):
+        """
+        Place one clip per (n_pairs, 2) frequency matrix at each destination path.
+
+        Only clips missing from the store are rendered, in a single batch.
+
+        Returns:
+            Counts of rendered, linked and already up-to-date clips
+        """
+        tone_freqs = np.asarray(tone_freqs, dtype=np.float64)
+        keys = [stimulus_key(freqs, sample_rate, tone_dtype, method=method, audio_format=audio_format,
+                             harmonics=harmonics)
+                for freqs in tone_freqs]
+        missing = [i for i, key in enumerate(keys) if not os.path.exists(self.path(key, audio_format))]
+
+        if missing:
+            clips = stimulus_engine.render_tone_matrix(tone_freqs[missing], sample_rate,
+                                                       dtype=np.int16, tone_dtype=tone_dtype, method=method,
+                                                       harmonics=harmonics)
+            for i, audio in zip(missing, clips):
+                store_path = self.path(keys[i], audio_format)
+                os.makedirs(os.path.dirname(store_path), exist_ok=True)
+                temp_path = f"{store_path}.{os.getpid()}.tmp"
+                audio_export.write_audio(temp_path, sample_rate, audio, audio_format)
+                os.replace(temp_path, store_path)  # Atomic, so concurrent runs never see a partial file
+
+        counts = {"rendered": len(set(keys[i] for i in missing)), "linked": 0, "unchanged": 0}
+        for key, dest in zip(keys, dest_paths):
+            store_path = self.path(key, audio_format)
+            if os.path.exists(dest) and os.path.samefile(dest, store_path):
+                counts["unchanged"] += 1
+                continue
+            if os.path.exists(dest):
+                os.remove(dest)
+            try:
+                os.link(store_path, dest)
+            except OSError:
+                shutil.copyfile(store_path, dest)  # Different file system or no hard-link support
+            counts["linked"] += 1
+        return counts
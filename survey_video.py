@@ -0,0 +1,284 @@
+import csv
+import glob
+import hashlib
+import json
+import os
+import subprocess
+import sys
+import time
+
+import make_Video
+import stimulus_store
+import verify_stimuli
+
+# ==========================================
+# ## Parameter Definitions (User Configuration)
+# ==========================================
+
+SCENE_DIR = os.path.join("output", "videos")  # Manim media dir of the instruction scenes (make_anima/*.py)
+STIMULUS_DIR = "MPC_Video"  # Stimulus MP4s (make_Video.py)
+RECORD_DIR = "MPC_Audio"  # Folder of the *result_record.csv answer-key records (per group or batch)
+OUTPUT_DIR = "survey_videos"  # Assembled survey videos, one per group
+CACHE_DIR = ".survey_cache"  # Normalized segments, keyed by source hash and encoding settings
+GROUPS = ["200", "1000", "5000"]  # One survey video per group, stimuli in record order
+INTRO_SCENES = ["Introduction", "TwoSineWaves", "WeChoose", "WholeAudio", "Ready"]  # Played before the stimuli
+
+# Common encoding every segment is normalized to, so assembly is a pure stream copy
+WIDTH = 1920
+HEIGHT = 1080
+FPS = 30
+VIDEO_CRF = 18  # x264 quality (lower is better)
+AUDIO_RATE = 44100  # Stimulus sampling rate; segments without audio get silence at this rate
+AUDIO_BITRATE = "192k"
+TIMESCALE = 90000  # MP4 video time base shared by all segments
+
+
+# ==========================================
+# ## Normalization
+# ==========================================
+
+def probe(path):
+    """
+    Read duration and audio stream of a media file with ffprobe.
+
+    :return: (duration in seconds, dict of the first audio stream's codec_name/sample_rate/channels/duration
+             or None)
+    """
+    output = subprocess.run(["ffprobe", "-v", "error", "-show_entries",
+                             "format=duration:stream=codec_type,codec_name,sample_rate,channels,duration",
+                             "-of", "json", path], check=True, capture_output=True).stdout
+    info = json.loads(output)
+    audio = next((stream for stream in info.get("streams", []) if stream.get("codec_type") == "audio"), None)
+    return float(info["format"]["duration"]), audio
+
+
+def audio_matches(audio):
+    """Whether an audio stream already has the target codec, rate and channels (so it can be copied)."""
+    return (audio is not None and audio.get("codec_name") == "aac" and int(audio.get("sample_rate", 0)) == AUDIO_RATE
+            and int(audio.get("channels", 0)) == 1)
+
+
+def build_normalize_command(source_path, output_path, audio, threads):
+    """
+    Build the FFmpeg command that re-encodes one segment to the common survey encoding.
+
+    Video is scaled and letterboxed to WIDTH x HEIGHT at a constant FPS. Audio
+    that is already AAC mono at AUDIO_RATE (the stimuli from make_Video) is
+    copied, so the stimuli get no second lossy pass; other audio is encoded to
+    that format, and segments without audio (the Manim scenes) get silence,
+    so every segment has the same two streams.
+
+    :param audio: Audio stream info from probe (None if the source has no audio)
+    :param threads: Thread limit of this ffmpeg process
+    """
+    video_filter = (f"scale={WIDTH}:{HEIGHT}:force_original_aspect_ratio=decrease,"
+                    f"pad={WIDTH}:{HEIGHT}:(ow-iw)/2:(oh-ih)/2:color=black,setsar=1,fps={FPS},format=yuv420p")
+    audio_encode = ["-c:a", "aac", "-b:a", AUDIO_BITRATE, "-ar", str(AUDIO_RATE), "-ac", "1"]
+    if audio_matches(audio):
+        # The copied audio sets the length: hold the last frame so the video never ends first, and
+        # cut at the audio length (-shortest does not stop an endless filter next to a copied stream)
+        video_filter += ",tpad=stop_mode=clone:stop=-1"
+        audio_input = []
+        audio_options = ["-map", "0:a:0", "-c:a", "copy", "-t", str(audio["duration"])]
+    elif audio is not None:
+        audio_input = []
+        audio_options = ["-map", "0:a:0", "-af", "apad", *audio_encode]  # Pad so audio never ends before the video
+    else:
+        audio_input = ["-f", "lavfi", "-i", f"anullsrc=r={AUDIO_RATE}:cl=mono"]
+        audio_options = ["-map", "1:a:0", *audio_encode]
+    return [
+        "ffmpeg",
+        "-y",
+        "-loglevel", "error",
+        "-i", source_path,
+        *audio_input,
+        "-map", "0:v:0",
+        *audio_options,
+        "-vf", video_filter,
+        "-c:v", "libx264",
+        "-crf", str(VIDEO_CRF),
+        "-profile:v", "high",
+        "-g", str(2 * FPS),               # Keyframe every 2 s
+        "-shortest",                      # End with the finite stream (silence, padding and held frames are endless)
+        "-video_track_timescale", str(TIMESCALE),
+        "-movflags", "+faststart",
+        "-threads", str(threads),
+        "-f", "mp4",
+        output_path
+    ]
+
+
+def normalize_settings():
+    """Hash of the normalization commands with placeholder paths; changing any option invalidates the cache."""
+    audio_variants = [None, {"codec_name": "aac", "sample_rate": str(AUDIO_RATE), "channels": 1, "duration": "{seconds}"},
+                      {}]
+    commands = [build_normalize_command("{source}", "{output}", audio, "{threads}") for audio in audio_variants]
+    return hashlib.sha256(json.dumps(commands).encode()).hexdigest()
+
+
+def normalized_path(source_hash, cache_dir=CACHE_DIR):
+    """Cache location of a source file normalized with the current settings."""
+    digest = hashlib.sha256(f"{source_hash}-{normalize_settings()}".encode()).hexdigest()
+    return os.path.join(cache_dir, digest[:2], f"{digest}.mp4")
+
+
+def normalize_segments(paths, cache_dir=CACHE_DIR, max_workers=make_Video.MAX_WORKERS,
+                       ffmpeg_threads=make_Video.FFMPEG_THREADS, retries=make_Video.MAX_RETRIES):
+    """
+    Normalize every source file that is not in the cache yet, in parallel.
+
+    Each segment is encoded once per source content and settings; later
+    assemblies, in any order, reuse it. Outputs are written to a temporary
+    name and moved into place only on success, so an interrupted run never
+    leaves a broken cache entry.
+
+    :return: Dict of source path -> {"path": normalized file, "duration": seconds}
+    """
+    threads = make_Video.thread_count(ffmpeg_threads, max_workers)
+    segments, jobs, pending = {}, [], {}
+    for path in dict.fromkeys(paths):
+        target = normalized_path(stimulus_store.file_hash(path), cache_dir)
+        segments[path] = {"path": target}
+        if not os.path.exists(target):
+            os.makedirs(os.path.dirname(target), exist_ok=True)
+            _, audio = probe(path)
+            temp_path = target + ".part"
+            jobs.append((path, build_normalize_command(path, temp_path, audio, threads)))
+            pending[path] = temp_path
+
+    print(f"{len(segments) - len(jobs)} of {len(segments)} segments already normalized")
+    if jobs:
+        start = time.perf_counter()
+        results = make_Video.run_jobs(jobs, max_workers, retries)
+        make_Video.print_summary(results, time.perf_counter() - start, max_workers)
+        failed = [r["name"] for r in results if r["error"]]
+        if failed:
+            raise RuntimeError(f"Could not normalize: {', '.join(failed)}")
+        for path, temp_path in pending.items():
+            os.replace(temp_path, segments[path]["path"])
+
+    for segment in segments.values():
+        segment["duration"] = probe(segment["path"])[0]
+    return segments
+
+
+# ==========================================
+# ## Assembly
+# ==========================================
+
+def scene_video(scene_name, scene_dir=SCENE_DIR):
+    """Newest rendered MP4 of a Manim scene anywhere under the media dir (any quality folder)."""
+    candidates = [path for path in glob.glob(os.path.join(scene_dir, "**", f"{scene_name}.mp4"), recursive=True)
+                  if "partial_movie_files" not in path]
+    if not candidates:
+        raise FileNotFoundError(f"No rendered video of scene {scene_name} under {scene_dir}")
+    return max(candidates, key=os.path.getmtime)
+
+
+def stimulus_videos(group_name, record_dir=RECORD_DIR, stimulus_dir=STIMULUS_DIR,
+                    record_pattern=verify_stimuli.RECORD_PATTERN):
+    """
+    Stimulus MP4s of a group in answer-key order, read from the record CSVs.
+
+    Every record matching the pattern is read (a make_audio_record
+    <group>_result_record.csv as well as make_audio_batch's merged
+    batch_result_record.csv), keeping the rows whose file name starts
+    with the group (GroupName-Index-CompFreq-AnswerCode). A clip listed
+    by several records is used once; records that disagree on a clip
+    (e.g. a stale record from an earlier run) raise a ValueError.
+    """
+    rows = []
+    for csv_path in sorted(glob.glob(os.path.join(record_dir, record_pattern))):
+        with open(csv_path, newline='', encoding='utf-8') as f:
+            rows.extend((csv_path, row["Filename"]) for row in csv.DictReader(f)
+                        if row["Filename"].rsplit("-", 3)[0] == group_name)
+    if not rows:
+        raise FileNotFoundError(f"No clips of group {group_name} in {os.path.join(record_dir, record_pattern)}")
+    # Records from make_audio_record list WAVs; make_Video names their MP4s
+    names = make_Video.output_names(list(dict.fromkeys(f for _, f in rows if not f.lower().endswith(".mp4"))))
+
+    clips, sources = {}, {}
+    for csv_path, filename in rows:
+        index = filename.rsplit("-", 3)[1]
+        name = names.get(filename, filename)
+        if index in clips and clips[index] != name:
+            raise ValueError(f"Records disagree on clip {group_name}-{index}: {clips[index]} in {sources[index]}, "
+                             f"{name} in {csv_path}")
+        clips.setdefault(index, name)
+        sources.setdefault(index, csv_path)
+    return [os.path.join(stimulus_dir, name) for name in clips.values()]
+
+
+def group_playlist(group_name, scenes=INTRO_SCENES, scene_dir=SCENE_DIR, record_dir=RECORD_DIR,
+                   stimulus_dir=STIMULUS_DIR):
+    """Ordered source files of one survey video: the instruction scenes, then the group's stimuli."""
+    return [scene_video(scene, scene_dir) for scene in scenes] + stimulus_videos(group_name, record_dir, stimulus_dir)
+
+
+def write_concat_list(list_path, paths):
+    """Write an ffmpeg concat demuxer list (absolute paths, single quotes escaped)."""
+    with open(list_path, "w", encoding="utf-8") as f:
+        for path in paths:
+            escaped = os.path.abspath(path).replace("'", "'\\''")
+            f.write(f"file '{escaped}'\n")
+
+
+def build_concat_command(list_path, output_path):
+    """Build the FFmpeg command that joins normalized segments without re-encoding."""
+    return [
+        "ffmpeg",
+        "-y",
+        "-loglevel", "error",
+        "-f", "concat",
+        "-safe", "0",                     # The list holds absolute paths
+        "-i", list_path,
+        "-c", "copy",                     # Segments share one encoding: no re-encode
+        "-movflags", "+faststart",
+        output_path
+    ]
+
+
+def assemble(playlist, output_path, cache_dir=CACHE_DIR, max_workers=make_Video.MAX_WORKERS):
+    """
+    Build one survey video from an ordered playlist of source files.
+
+    Sources are normalized once (see normalize_segments) and then joined by
+    stream copy, so a new ordering of already-normalized sources costs only
+    the copy. An index of the start time of every part is written next to
+    the video.
+
+    :param playlist: Source MP4 paths in playback order (a file may appear more than once)
+    :return: The index entries (one per playlist item)
+    """
+    start = time.perf_counter()
+    segments = normalize_segments(playlist, cache_dir, max_workers)
+
+    os.makedirs(os.path.dirname(output_path) or ".", exist_ok=True)
+    list_path = os.path.splitext(output_path)[0] + ".concat.txt"
+    write_concat_list(list_path, [segments[path]["path"] for path in playlist])
+    copy_start = time.perf_counter()
+    result = make_Video.run_job(os.path.basename(output_path), build_concat_command(list_path, output_path))
+    if result["error"]:
+        raise RuntimeError(f"Could not assemble {output_path}: {result['error']}")
+
+    index, position = [], 0.0
+    for path in playlist:
+        duration = segments[path]["duration"]
+        index.append({"source": os.path.basename(path), "start_seconds": round(position, 3),
+                      "duration_seconds": round(duration, 3)})
+        position += duration
+    with open(os.path.splitext(output_path)[0] + ".index.json", "w", encoding="utf-8") as f:
+        json.dump({"video": os.path.basename(output_path), "parts": index}, f, indent=2)
+
+    print(f"Assembled {output_path}: {len(playlist)} parts, {position / 60:.1f} min "
+          f"(concat {time.perf_counter() - copy_start:.2f}s, total {time.perf_counter() - start:.2f}s)")
+    return index
+
+
+def main(groups=GROUPS):
+    for group_name in groups:
+        assemble(group_playlist(group_name), os.path.join(OUTPUT_DIR, f"survey_{group_name}.mp4"))
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:] or GROUPS)
@@ -0,0 +1,41 @@
+import random
+
+import pytest
+
+import adaptive_staircase
+
+
+def run_session(procedure, pairs_per_trial, num_trials, seed=0):
+    """Answer num_trials trials, getting the first pair of every third trial wrong; return the presented deltas."""
+    session = adaptive_staircase.AdaptiveSession(procedure, pairs_per_trial=pairs_per_trial, rng=random.Random(seed))
+    presented = []
+    for trial in range(num_trials):
+        _, comp_freq, code_str = session.next_trial()
+        presented.append(session.center_freq - comp_freq)
+        answers = list(code_str)
+        if trial % 3 == 0:
+            answers[0] = "S" if answers[0] == "F" else "F"
+        session.record_response("".join(answers))
+    return session, presented
+
+
+@pytest.mark.parametrize("pairs_per_trial", [1, 4])
+def test_fixed_ladder_runs_past_one_pass(pairs_per_trial):
+    procedure = adaptive_staircase.FixedLadder(rng=random.Random(1))
+    session, presented = run_session(procedure, pairs_per_trial, 3 * adaptive_staircase.LADDER_PAIRS)
+    assert len(session.history) == 3 * adaptive_staircase.LADDER_PAIRS
+    # Every pass presents each rung once
+    first_pass = presented[:adaptive_staircase.LADDER_PAIRS]
+    assert sorted(first_pass) == pytest.approx(procedure.ladder)
+
+
+@pytest.mark.parametrize("pairs_per_trial", [1, 4])
+def test_staircase_steps_once_per_trial_from_presented_delta(pairs_per_trial):
+    procedure = adaptive_staircase.Staircase(n_down=2)
+    _, presented = run_session(procedure, pairs_per_trial, 30)
+    for before, after in zip(presented, presented[1:]):
+        ratio = after / before
+        # One step per trial: unchanged, or one coarse/fine step up or down
+        allowed = [1.0, 2.0, 0.5, 2 ** 0.5, 2 ** -0.5]
+        assert any(ratio == pytest.approx(a) for a in allowed) or after in (procedure.min_delta, procedure.max_delta)
+    assert set(procedure.reversals) <= set(presented)
@@ -0,0 +1,60 @@
+import re
+import shutil
+import subprocess
+
+import numpy as np
+import pytest
+from scipy.io import wavfile
+
+import make_Video
+import stimulus_engine
+
+pytestmark = pytest.mark.skipif(shutil.which("ffmpeg") is None, reason="needs a real ffmpeg")
+
+SAMPLE_RATE = 44100
+AUDIO_SECONDS = 2.3  # Not a multiple of the still segment, so the looped still has to be cut with -t
+
+
+def media_duration(path):
+    """Container duration reported by ffmpeg -i (the longest stream)."""
+    stderr = subprocess.run(["ffmpeg", "-hide_banner", "-i", str(path)], capture_output=True, text=True).stderr
+    hours, minutes, seconds = re.search(r"Duration: (\d+):(\d+):([\d.]+)", stderr).groups()
+    return int(hours) * 3600 + int(minutes) * 60 + float(seconds)
+
+
+@pytest.fixture
+def inputs(tmp_path):
+    """A WAV folder with one clip and an odd-sized PNG."""
+    wav_folder = tmp_path / "wav"
+    wav_folder.mkdir()
+    t = np.arange(int(AUDIO_SECONDS * SAMPLE_RATE)) / SAMPLE_RATE
+    wavfile.write(wav_folder / "200-1-195-FFSS.wav", SAMPLE_RATE, (10000 * np.sin(2 * np.pi * 200 * t)).astype(np.int16))
+    png_path = tmp_path / "odd.png"
+    subprocess.run(["ffmpeg", "-loglevel", "error", "-f", "lavfi", "-i", "color=c=black:s=101x75",
+                    "-frames:v", "1", str(png_path)], check=True)
+    return wav_folder, png_path
+
+
+@pytest.mark.parametrize("reuse_still", [True, False])
+def test_mp4_duration_matches_audio(tmp_path, inputs, reuse_still):
+    wav_folder, png_path = inputs
+    output_folder = tmp_path / "mp4"
+    results = make_Video.combine_wav_and_png_to_mp4(str(wav_folder), str(png_path), str(output_folder),
+                                                    max_workers=1, retries=0, reuse_still=reuse_still)
+    assert [r["error"] for r in results] == [None]
+    duration = media_duration(output_folder / "200-1-195-FFSS.mp4")
+    assert duration == pytest.approx(AUDIO_SECONDS, abs=1 / make_Video.STILL_FPS + 0.03)
+
+
+@pytest.mark.parametrize("reuse_still", [True, False])
+def test_piped_mp4_duration_matches_clip(tmp_path, inputs, reuse_still):
+    _, png_path = inputs
+    output_folder = tmp_path / "mp4"
+    csv_path = make_Video.stimuli_to_mp4(200, 1, 2, "200", str(png_path), str(output_folder), max_workers=1,
+                                         retries=0, reuse_still=reuse_still)
+    clip_seconds = stimulus_engine.pair_layout(SAMPLE_RATE)[2] * stimulus_engine.PAIRS_PER_CLIP / SAMPLE_RATE
+    with open(csv_path, encoding="utf-8") as f:
+        names = [line.split(",")[0] for line in f.read().splitlines()[1:]]
+    assert len(names) == 2
+    for name in names:
+        assert media_duration(output_folder / name) == pytest.approx(clip_seconds, abs=1 / make_Video.STILL_FPS + 0.03)
@@ -0,0 +1,248 @@
+import csv
+import glob
+import os
+import re
+import sys
+import time
+
+import numpy as np
+import scipy.fft
+from scipy.io import wavfile
+
+import audio_export
+import stimulus_engine
+
+# ==========================================
+# ## Parameter Definitions (User Configuration)
+# ==========================================
+
+OUTPUT_DIR = "MPC_Audio"  # Folder of generated stimuli to verify
+RECORD_PATTERN = "*result_record.csv"  # Record CSVs in that folder (make_audio_record / make_audio_batch)
+REPORT_NAME = "verification_report.csv"  # Per-tone report, written into the folder
+SAMPLE_RATE = 44100  # Expected sampling rate
+FREQ_TOLERANCE_HZ = 0.05  # Largest allowed measured-vs-expected difference; below half the smallest step (0.1 Hz)
+FILES_PER_BATCH = 128  # Clips whose tone windows go through one 2-D FFT (about 90 MB of float32 windows)
+
+# Filename: GroupName-Index-CompFreq-AnswerCode.wav (e.g., 5000-3-4982-SFSS.wav)
+FILENAME_RE = re.compile(r"^(?P<group>.+)-(?P<index>\d+)-(?P<comp>\d+(?:\.\d+)?)-(?P<code>[FS]+)\.(?:wav|flac)$")
+REPORT_HEADERS = ["Filename", "Pair", "Tone", "Expected_Freq(Hz)", "Measured_Freq(Hz)", "RMS(dBFS)",
+                  "Clipped_Samples", "Problems"]
+
+
+# ==========================================
+# ## Expected Stimuli
+# ==========================================
+
+def read_records(folder, pattern=RECORD_PATTERN):
+    """Map filename -> (center, comparison, answer code) from every record CSV in the folder."""
+    records = {}
+    for csv_path in sorted(glob.glob(os.path.join(folder, pattern))):
+        with open(csv_path, newline='', encoding='utf-8') as f:
+            for row in csv.DictReader(f):
+                records[row["Filename"]] = (float(row["Center_Freq(Hz)"]), float(row["Comp_Freq(Hz)"]),
+                                            row["Answer_Key(FSFF)"])
+    return records
+
+
+def expected_clip(filename, records):
+    """
+    Expected center, comparison and code of a clip, plus any problems found before looking at the audio.
+
+    The filename is the primary source; the record CSV must agree with it.
+    Without a record entry the center is taken from a numeric group name.
+    """
+    problems = []
+    match = FILENAME_RE.match(filename)
+    if not match:
+        return None, ["filename does not match GroupName-Index-CompFreq-AnswerCode"]
+    comp_freq, code = float(match["comp"]), match["code"]
+
+    if filename in records:
+        center_freq, record_comp, record_code = records[filename]
+        if record_comp != comp_freq:
+            problems.append(f"record comparison {record_comp:g} Hz != filename {comp_freq:g} Hz")
+        if record_code != code:
+            problems.append(f"record code {record_code} != filename {code}")
+    else:
+        problems.append("missing from record CSV")
+        try:
+            center_freq = float(match["group"])
+        except ValueError:
+            return None, problems + ["center frequency unknown"]
+    return (center_freq, comp_freq, code), problems
+
+
+# ==========================================
+# ## Batched Analysis
+# ==========================================
+
+def load_samples(path):
+    """Samples of a stimulus, memory-mapped for WAV; returns (sample_rate, samples)."""
+    if path.lower().endswith(".wav"):
+        return wavfile.read(path, mmap=True)
+    return audio_export.read_audio(path)
+
+
+def tone_windows(samples, n_pairs, sample_rate=SAMPLE_RATE):
+    """View the tones of a clip as a (n_pairs, 2, tone) array (first and second tone of each pair)."""
+    _, tone, pair = stimulus_engine.pair_layout(sample_rate)
+    first, second = stimulus_engine.tone_offsets(sample_rate)
+    pairs = samples[:n_pairs * pair].reshape(n_pairs, pair)
+    return np.stack([pairs[:, first:first + tone], pairs[:, second:second + tone]], axis=1)
+
+
+def analyze_windows(windows, sample_rate=SAMPLE_RATE):
+    """
+    Measure frequency, RMS level and clipping of many tone windows at once.
+
+    All windows go through one Hann-windowed 2-D rfft; the peak frequency is
+    refined by parabolic interpolation of the log magnitude around the
+    largest bin, which is accurate to a few hundredths of a bin for a pure
+    tone.
+
+    Args:
+        windows: int16 array (n_windows, n_samples)
+
+    Returns:
+        1. freqs: Measured frequency of each window (Hz)
+        2. rms_db: RMS level of each window (dBFS)
+        3. clipped: Number of consecutive full-scale samples in each window
+    """
+    n = windows.shape[1]
+    data = windows.astype(np.float32)
+    rms = np.sqrt(np.einsum("ij,ij->i", data, data, dtype=np.float64) / n)
+    rms_db = 20 * np.log10(np.maximum(rms, 1e-12) / 32768)
+
+    # A sine scaled by 32767 touches full scale at single peaks; runs of full-scale samples mean clipping
+    rail = (windows >= 32767) | (windows <= -32767)
+    clipped = np.count_nonzero(rail[:, 1:] & rail[:, :-1], axis=1)
+
+    data *= np.hanning(n).astype(np.float32)
+    spectrum = scipy.fft.rfft(data, axis=1, overwrite_x=True, workers=-1)
+    power = np.square(spectrum.real)
+    power += np.square(spectrum.imag)
+
+    # Parabolic interpolation on log power gives the same shift as on log magnitude
+    peak = np.argmax(power[:, 1:-1], axis=1) + 1
+    rows = np.arange(len(power))
+    a, b, c = (np.log(power[rows, peak + k] + 1e-20) for k in (-1, 0, 1))
+    denominator = a - 2 * b + c
+    shift = np.where(denominator != 0, 0.5 * (a - c) / np.where(denominator != 0, denominator, 1), 0)
+    freqs = (peak + shift) * sample_rate / n
+    return freqs, rms_db, clipped
+
+
+def verify_batch(batch, sample_rate=SAMPLE_RATE, tolerance=FREQ_TOLERANCE_HZ):
+    """
+    Verify a batch of clips with one transform over all their tone windows.
+
+    Args:
+        batch: List of (filename, samples, (center, comp, code), problems)
+
+    Returns:
+        Report rows (one per tone) and the set of filenames that failed
+    """
+    tone = stimulus_engine.pair_layout(sample_rate)[1]
+    windows = np.concatenate([tone_windows(samples, len(expected[2]), sample_rate).reshape(-1, tone)
+                              for _, samples, expected, _ in batch])
+    freqs, rms_db, clipped = analyze_windows(windows, sample_rate)
+
+    rows, failed = [], set()
+    position = 0
+    for filename, _, (center_freq, comp_freq, code), problems in batch:
+        n = 2 * len(code)
+        measured = freqs[position:position + n].reshape(-1, 2)
+        expected = np.array([(center_freq, comp_freq) if c == "F" else (comp_freq, center_freq) for c in code])
+        measured_code = "".join(np.where(measured[:, 0] > measured[:, 1], "F", "S"))
+        clip_problems = list(problems)
+        if measured_code != code:
+            clip_problems.append(f"audio order {measured_code} != code {code}")
+
+        for i in range(n):
+            pair, which = divmod(i, 2)
+            tone_problems = list(clip_problems)
+            error = abs(measured[pair, which] - expected[pair, which])
+            if error > tolerance:
+                tone_problems.append(f"frequency off by {error:.2f} Hz")
+            if clipped[position + i]:
+                tone_problems.append("clipping")
+            if tone_problems:
+                failed.add(filename)
+            rows.append([filename, pair + 1, ("First", "Second")[which], expected[pair, which],
+                         round(float(measured[pair, which]), 3), round(float(rms_db[position + i]), 2),
+                         int(clipped[position + i]), "; ".join(tone_problems)])
+        position += n
+    return rows, failed
+
+
+def verify_folder(folder=OUTPUT_DIR, sample_rate=SAMPLE_RATE, tolerance=FREQ_TOLERANCE_HZ,
+                  files_per_batch=FILES_PER_BATCH):
+    """
+    Verify every stimulus in a folder against its filename and the record CSVs.
+
+    Returns:
+        1. report_rows: One row per tone (clips that cannot be analyzed get a single row)
+        2. failed: Sorted filenames with at least one problem
+        3. num_files: Number of stimulus files found
+    """
+    records = read_records(folder)
+    filenames = sorted(f for f in os.listdir(folder) if f.lower().endswith((".wav", ".flac")))
+    pair = stimulus_engine.pair_layout(sample_rate)[2]
+
+    report_rows, failed = [], set()
+    batch = []
+    for i, filename in enumerate(filenames):
+        expected, problems = expected_clip(filename, records)
+        if expected is not None:
+            rate, samples = load_samples(os.path.join(folder, filename))
+            if rate != sample_rate:
+                problems.append(f"sample rate {rate} != {sample_rate}")
+            elif samples.dtype != np.int16 or samples.ndim != 1:
+                problems.append(f"expected 16-bit mono, got {samples.dtype} with {samples.ndim} dimension(s)")
+            elif len(samples) != pair * len(expected[2]):
+                problems.append(f"{len(samples)} samples, expected {pair * len(expected[2])} for {len(expected[2])} "
+                                f"pairs")
+            else:
+                batch.append((filename, samples, expected, problems))
+                problems = None
+        if problems is not None:
+            failed.add(filename)
+            report_rows.append([filename, "", "", "", "", "", "", "; ".join(problems)])
+
+        if len(batch) >= files_per_batch or (batch and i == len(filenames) - 1):
+            rows, batch_failed = verify_batch(batch, sample_rate, tolerance)
+            report_rows.extend(rows)
+            failed |= batch_failed
+            batch = []
+
+    missing = sorted(set(records) - set(filenames))
+    for filename in missing:
+        failed.add(filename)
+        report_rows.append([filename, "", "", "", "", "", "", "listed in record CSV but file is missing"])
+    return report_rows, sorted(failed), len(filenames)
+
+
+def main(folder=OUTPUT_DIR):
+    start = time.perf_counter()
+    report_rows, failed, num_files = verify_folder(folder)
+    elapsed = time.perf_counter() - start
+
+    report_path = os.path.join(folder, REPORT_NAME)
+    with open(report_path, mode='w', newline='', encoding='utf-8') as f:
+        writer = csv.writer(f)
+        writer.writerow(REPORT_HEADERS)
+        writer.writerows(report_rows)
+
+    levels = [row[5] for row in report_rows if row[5] != ""]
+    print(f"Verified {num_files} files in {elapsed:.2f}s")
+    if levels:
+        print(f"Tone level: {min(levels):.2f} to {max(levels):.2f} dBFS RMS")
+    for filename in failed:
+        problems = {problem for row in report_rows if row[0] == filename and row[7] for problem in row[7].split("; ")}
+        print(f"FAILED {filename}: {'; '.join(sorted(problems))}")
+    print(f"{len(failed)} problem file(s); per-tone report: {report_path}")
+    return not failed
+
+
+if __name__ == "__main__":
+    sys.exit(0 if main(sys.argv[1] if len(sys.argv) > 1 else OUTPUT_DIR) else 1)